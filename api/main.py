@@ -38,6 +38,7 @@ from api.security.vulnerability_scanner import vulnerability_scanner
 from config.logging import get_logger, setup_logging
 from database.pg_connections import get_db_info, init_db, get_db, SessionLocal
 from database.pg_models import User, CreateOrderRequest, CaptureRequest
+from decision_engine.grok_client import aclose_http_client
 from emailing import email_service
 from subscriptions import paypal, flutterwave, stripe, commissions, stripe_connect
 from subscriptions.beta_service import BetaService
@@ -677,6 +678,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown"""
     await close_cache()
+    await aclose_http_client()
 
 # Include API routers (specific routes)
 # app.include_router(ai.router, prefix="/api")  # DEPRECATED: ai_db uses deleted analyst_db module
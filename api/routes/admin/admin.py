@@ -1,4 +1,6 @@
 
+import re
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
@@ -14,6 +16,24 @@ from datetime import datetime, date, timedelta, timezone
 router = APIRouter(prefix="/admin",
                    tags=["admin"])
 
+# Analysis type -> goal/objective keywords that indicate it
+_ANALYSIS_TYPE_KEYWORDS = {
+    "Sales Analysis": ["sales", "revenue", "selling", "conversion", "close rate", "deal", "pipeline"],
+    "Customer Analysis": ["customer", "retention", "churn", "satisfaction", "support", "service", "experience"],
+    "Market Analysis": ["market", "competitor", "industry", "positioning", "segment", "target audience"],
+    "Financial Analysis": ["financial", "budget", "cost", "roi", "profit", "pricing", "expense"],
+    "Operations Analysis": ["operations", "process", "efficiency", "workflow", "productivity", "automation"],
+    "Product Analysis": ["product", "feature", "development", "roadmap", "launch", "innovation"],
+    "Marketing Analysis": ["marketing", "campaign", "advertising", "brand", "awareness", "lead generation", "newsletter", "email", "social media", "seo", "content"],
+}
+
+# One compiled alternation per type, zero-width so overlapping keywords all match;
+# a type's score is how many distinct keywords it finds in one scan of the text
+_ANALYSIS_TYPE_PATTERNS = {
+    analysis_type: re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+    for analysis_type, keywords in _ANALYSIS_TYPE_KEYWORDS.items()
+}
+
 @router.get("/dashboard")
 def admin_dashboard(user=Depends(admin_required), db: Session = Depends(get_db)):
     """Admin dashboard endpoint."""
@@ -616,23 +636,12 @@ def update_existing_analyses(
 
         def infer_analysis_type(business_goal: str, intent_analysis: dict) -> str:
             """Infer analysis type from business goal and intent analysis"""
-            goal_lower = business_goal.lower() if business_goal else ""
-            objective = intent_analysis.get("objective", "").lower() if intent_analysis else ""
-            combined_text = f"{goal_lower} {objective}"
-
-            type_keywords = {
-                "Sales Analysis": ["sales", "revenue", "selling", "conversion", "close rate", "deal", "pipeline"],
-                "Customer Analysis": ["customer", "retention", "churn", "satisfaction", "support", "service", "experience"],
-                "Market Analysis": ["market", "competitor", "industry", "positioning", "segment", "target audience"],
-                "Financial Analysis": ["financial", "budget", "cost", "roi", "profit", "pricing", "expense"],
-                "Operations Analysis": ["operations", "process", "efficiency", "workflow", "productivity", "automation"],
-                "Product Analysis": ["product", "feature", "development", "roadmap", "launch", "innovation"],
-                "Marketing Analysis": ["marketing", "campaign", "advertising", "brand", "awareness", "lead generation", "newsletter", "email", "social media", "seo", "content"],
-            }
+            objective = intent_analysis.get("objective", "") if intent_analysis else ""
+            combined_text = f"{business_goal or ''} {objective}".lower()
 
             scores = {}
-            for analysis_type, keywords in type_keywords.items():
-                score = sum(1 for keyword in keywords if keyword in combined_text)
+            for analysis_type, pattern in _ANALYSIS_TYPE_PATTERNS.items():
+                score = len(set(pattern.findall(combined_text)))
                 if score > 0:
                     scores[analysis_type] = score
 
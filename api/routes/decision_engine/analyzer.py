@@ -6,11 +6,11 @@ action plans, toolkits, and execution roadmaps.
 """
 
 import asyncio
-import json
 import logging
 from datetime import datetime
+import orjson
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -114,8 +114,8 @@ def parse_json_field(field_value, default=None):
 
     if isinstance(field_value, str):
         try:
-            return json.loads(field_value)
-        except json.JSONDecodeError:
+            return orjson.loads(field_value)
+        except orjson.JSONDecodeError:
             return default if default is not None else []
 
     return default if default is not None else []
@@ -186,10 +186,10 @@ async def _enrich_stacks_background(
         )
         db.execute(
             text("UPDATE business_analyses SET recommended_tool_stacks = :stacks WHERE id = :id"),
-            {"stacks": json.dumps(enriched), "id": analysis_id},
+            {"stacks": orjson.dumps(enriched).decode(), "id": analysis_id},
         )
         db.commit()
-        logger.info(f"Background stack enrichment saved for analysis {analysis_id}")
+        logger.info("Background stack enrichment saved for analysis %s", analysis_id)
     except Exception as exc:
         logger.error(
             f"Background stack enrichment failed for analysis {analysis_id}: {exc}",
@@ -217,7 +217,7 @@ async def analyze_business_goal(
 
     try:
         user_id = get_user_id(current_user)
-        logger.info(f"🚀 Starting agentic analysis for user {user_id}")
+        logger.info("🚀 Starting agentic analysis for user %s", user_id)
 
         content_type = request.headers.get("content-type", "")
 
@@ -240,8 +240,9 @@ async def analyze_business_goal(
         )
         if recent:
             logger.info(
-                f"⚡ Returning recent analysis {recent.id} for user {user_id} "
-                f"(submitted within 60 s — duplicate request prevented)"
+                "⚡ Returning recent analysis %s for user %s "
+                "(submitted within 60 s — duplicate request prevented)",
+                recent.id, user_id,
             )
             return {
                 "success": True,
@@ -281,9 +282,13 @@ async def analyze_business_goal(
                     document_bytes_list.append((file_bytes, filename))
 
             if image_bytes_list or document_bytes_list:
-                logger.info(f"Processing {len(image_bytes_list)} images and {len(document_bytes_list)} documents for user {user_id}")
+                logger.info(
+                    "Processing %d images and %d documents for user %s",
+                    len(image_bytes_list), len(document_bytes_list), user_id,
+                )
                 mm_handler = MultimodalHandler(use_vision_for_images=True)
-                mm_result = mm_handler.process_multimodal_query(
+                mm_result = await asyncio.to_thread(
+                    mm_handler.process_multimodal_query,
                     user_query=business_goal,
                     image_bytes_list=image_bytes_list,
                     document_bytes_list=document_bytes_list,
@@ -303,7 +308,7 @@ async def analyze_business_goal(
             user_id=user_id
         )
 
-        logger.info(f"✅ Analysis completed: ID {result['data']['analysis_id']}")
+        logger.info("✅ Analysis completed: ID %s", result['data']['analysis_id'])
 
         # Schedule background enrichment of automation stacks
         _raw_stacks = result["data"].get("recommended_tool_stacks", [])
@@ -317,14 +322,16 @@ async def analyze_business_goal(
                 bottleneck_title=_bottleneck_title,
             )
 
-        return {
+        # The payload is already plain JSON types; skip jsonable_encoder's recursive
+        # walk and serialize it in one orjson pass.
+        return ORJSONResponse({
             "success": True,
             "message": "Analysis completed successfully",
             "data": result["data"]
-        }
+        })
 
     except Exception as e:
-        logger.error(f"❌ Analysis failed: {e}", exc_info=True)
+        logger.error("❌ Analysis failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
@@ -334,13 +341,17 @@ async def analyze_business_goal(
 @router.post("/analyze/stream")
 async def analyze_business_goal_stream(
     request: Request,
+    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     SSE streaming version of /analyze.
-    Sends progress events so the UI stays live during the LLM call,
-    then delivers the completed result as the final event.
+    Relays the analyzer's progress events (each stage, and each roadmap phase as
+    it closes) so the UI stays live during the LLM calls, then delivers the
+    completed result as the final event.
+
+    Event types: progress {step, pct, msg} | result {success, data} | error {message}
     """
     from decision_engine.agentic_analyzer import create_analyzer
     from decision_engine.multimodal.handler import MultimodalHandler
@@ -373,7 +384,8 @@ async def analyze_business_goal_stream(
             elif fn.endswith(('.pdf', '.docx', '.doc', '.xlsx', '.csv', '.txt')):
                 document_bytes_list.append((fb, fn))
         if image_bytes_list or document_bytes_list:
-            mm_result = mm_handler.process_multimodal_query(
+            mm_result = await asyncio.to_thread(
+                mm_handler.process_multimodal_query,
                 user_query=business_goal,
                 image_bytes_list=image_bytes_list,
                 document_bytes_list=document_bytes_list,
@@ -388,7 +400,7 @@ async def analyze_business_goal_stream(
 
     async def event_stream():
         def _send(event: str, payload: dict) -> str:
-            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            return f"event: {event}\ndata: {orjson.dumps(payload).decode()}\n\n"
 
         # Idempotency: return a cached recent result immediately
         from datetime import timedelta
@@ -408,53 +420,57 @@ async def analyze_business_goal_stream(
             yield _send("result", {"success": True, "data": format_analysis_for_frontend(recent)})
             return
 
-        try:
-            yield _send("progress", {"step": "reading", "pct": 5, "msg": "Reading your business challenge…"})
-            await asyncio.sleep(0)
-
-            yield _send("progress", {"step": "analyzing", "pct": 20, "msg": "Identifying bottlenecks…"})
-            await asyncio.sleep(0)
-
-            # Run the actual LLM analysis in a thread so we can keep yielding
-            loop = asyncio.get_event_loop()
-            analyzer = create_analyzer(db)
-
-            # Send intermediate heartbeat while LLM is running
-            async def heartbeat():
-                steps = [
-                    (40, "Mapping strategic constraints…"),
-                    (55, "Building action plans…"),
-                    (70, "Selecting AI tools…"),
-                    (85, "Compiling execution roadmap…"),
-                ]
-                for pct, msg in steps:
-                    await asyncio.sleep(8)
-                    yield _send("progress", {"step": "thinking", "pct": pct, "msg": msg})
-
-            analysis_task = loop.run_in_executor(
-                None,
-                lambda: asyncio.run(analyzer.analyze(user_query=business_goal, user_id=user_id))
-            )
+        yield _send("progress", {"step": "reading", "pct": 5, "msg": "Reading your business challenge…"})
 
-            hb_steps = [
-                (40, "Mapping strategic constraints…"),
-                (55, "Building action plans…"),
-                (70, "Selecting AI tools…"),
-                (85, "Compiling execution roadmap…"),
-            ]
-            for pct, msg in hb_steps:
-                done, _ = await asyncio.wait([analysis_task], timeout=8)
-                if done:
-                    break
-                yield _send("progress", {"step": "thinking", "pct": pct, "msg": msg})
+        # The analyzer runs as a task on this loop and reports progress through the
+        # callback; the queue hands each event to this generator as it arrives.
+        queue: asyncio.Queue = asyncio.Queue()
 
-            result = await analysis_task
-            yield _send("progress", {"step": "complete", "pct": 100, "msg": "Analysis complete!"})
-            yield _send("result", {"success": True, "data": result["data"]})
+        async def _progress_callback(pct: int, msg: str):
+            await queue.put(("progress", {"step": "thinking", "pct": pct, "msg": msg}))
 
-        except Exception as e:
-            logger.error(f"❌ Streaming analysis failed for user {user_id}: {e}", exc_info=True)
-            yield _send("error", {"message": str(e)})
+        async def _run_analysis():
+            try:
+                analyzer = create_analyzer(db)
+                result = await analyzer.analyze(
+                    user_query=business_goal,
+                    user_id=user_id,
+                    progress_callback=_progress_callback,
+                )
+
+                # Schedule background enrichment of automation stacks
+                _raw_stacks = result["data"].get("recommended_tool_stacks", [])
+                _bottleneck_title = result["data"].get("primary_bottleneck", {}).get("title", "")
+                if _raw_stacks:
+                    background_tasks.add_task(
+                        _enrich_stacks_background,
+                        analysis_id=result["data"]["analysis_id"],
+                        raw_stacks=_raw_stacks,
+                        user_query=business_goal,
+                        bottleneck_title=_bottleneck_title,
+                    )
+
+                await queue.put(("progress", {"step": "complete", "pct": 100, "msg": "Analysis complete!"}))
+                await queue.put(("result", {"success": True, "data": result["data"]}))
+            except Exception as e:
+                logger.error(
+                    "❌ Streaming analysis failed for user %s: %s", user_id, e, exc_info=True,
+                )
+                await queue.put(("error", {"message": str(e)}))
+            finally:
+                await queue.put(None)
+
+        analysis_task = asyncio.create_task(_run_analysis())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                event, payload = item
+                yield _send(event, payload)
+        finally:
+            # Client disconnected mid-stream: stop the analysis instead of orphaning it
+            analysis_task.cancel()
 
     return StreamingResponse(
         event_stream(),
@@ -464,7 +480,7 @@ async def analyze_business_goal_stream(
 
 
 @router.get("/analyses")
-async def get_user_analyses(
+def get_user_analyses(
     limit: int = 10,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -479,7 +495,7 @@ async def get_user_analyses(
     """
     try:
         user_id = get_user_id(current_user)
-        logger.info(f"📋 Fetching analyses for user {user_id}, limit={limit}")
+        logger.info("📋 Fetching analyses for user %s, limit=%s", user_id, limit)
 
         analyses = (
             db.query(BusinessAnalysis)
@@ -489,7 +505,7 @@ async def get_user_analyses(
             .all()
         )
 
-        logger.info(f"Found {len(analyses)} analyses for user {user_id}")
+        logger.info("Found %d analyses for user %s", len(analyses), user_id)
 
         # Transform to frontend format
         ui_analyses = []
@@ -498,17 +514,17 @@ async def get_user_analyses(
                 ui_data = format_analysis_for_frontend(analysis)
                 ui_analyses.append(ui_data)
             except Exception as e:
-                logger.warning(f"Failed to format analysis {analysis.id}: {e}")
+                logger.warning("Failed to format analysis %s: %s", analysis.id, e)
                 continue
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "count": len(ui_analyses),
             "data": ui_analyses
-        }
+        })
 
     except Exception as e:
-        logger.error(f"❌ Failed to fetch analyses: {e}", exc_info=True)
+        logger.error("❌ Failed to fetch analyses: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch analyses: {str(e)}"
@@ -516,7 +532,7 @@ async def get_user_analyses(
 
 
 @router.get("/analyses/{analysis_id}")
-async def get_analysis_detail(
+def get_analysis_detail(
     analysis_id: int,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -546,169 +562,23 @@ async def get_analysis_detail(
 
         ui_data = format_analysis_for_frontend(analysis)
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "data": ui_data
-        }
+        })
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Failed to fetch analysis {analysis_id}: {e}", exc_info=True)
+        logger.error("❌ Failed to fetch analysis %s: %s", analysis_id, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch analysis: {str(e)}"
         )
 
 
-@router.post("/analyze/stream")
-async def analyze_business_goal_stream(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    SSE streaming analysis endpoint.
-    Emits progress events during analysis, then the final result.
-
-    Event types: progress {pct, msg} | result {data} | error {message}
-    """
-    from decision_engine.agentic_analyzer import create_analyzer
-    from decision_engine.multimodal.handler import MultimodalHandler
-
-    try:
-        user_id = get_user_id(current_user)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=str(e))
-
-    # Parse request body (identical logic to /analyze)
-    content_type = request.headers.get("content-type", "")
-    business_goal = ""
-    files = []
-
-    try:
-        if "application/json" in content_type:
-            body = await request.json()
-            business_goal = body.get("business_goal", "")
-        elif "multipart/form-data" in content_type:
-            form_data = await request.form()
-            business_goal = form_data.get("business_goal", "")
-            files = form_data.getlist("files")
-        else:
-            raise HTTPException(status_code=400, detail="Invalid Content-Type")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse request: {e}")
-
-    if not business_goal and not files:
-        raise HTTPException(status_code=400, detail="Business goal or file upload required")
-
-    # Process multimodal files if present
-    if files:
-        image_bytes_list = []
-        document_bytes_list = []
-        for file in files:
-            file_bytes = await file.read()
-            filename = getattr(file, "filename", "").lower()
-            if filename.endswith(('.png', '.jpg', '.jpeg', '.gif')):
-                image_bytes_list.append((file_bytes, filename))
-            elif filename.endswith(('.pdf', '.docx', '.doc', '.xlsx', '.csv', '.txt')):
-                document_bytes_list.append((file_bytes, filename))
-        if image_bytes_list or document_bytes_list:
-            mm_handler = MultimodalHandler(use_vision_for_images=True)
-            mm_result = mm_handler.process_multimodal_query(
-                user_query=business_goal,
-                image_bytes_list=image_bytes_list,
-                document_bytes_list=document_bytes_list,
-                enhance_with_llm=False,
-            )
-            combined = mm_result.get("combined_context", "")
-            if combined:
-                business_goal = f"{business_goal}\n\n[Additional Context from Uploaded Files]:\n{combined}".strip()
-
-    if not business_goal:
-        raise HTTPException(status_code=400, detail="Could not extract content from uploaded files")
-
-    # Idempotency guard (same 60s window as /analyze)
-    from datetime import timedelta
-    from sqlalchemy import desc as _desc
-    recent_cutoff = datetime.utcnow() - timedelta(seconds=60)
-    recent = (
-        db.query(BusinessAnalysis)
-        .filter(
-            BusinessAnalysis.user_id == user_id,
-            BusinessAnalysis.created_at >= recent_cutoff,
-        )
-        .order_by(_desc(BusinessAnalysis.created_at))
-        .first()
-    )
-
-    if recent:
-        async def _cached_stream():
-            data = format_analysis_for_frontend(recent)
-            yield f"event: progress\ndata: {json.dumps({'pct': 100, 'msg': 'Returning recent analysis'})}\n\n"
-            yield f"event: result\ndata: {json.dumps({'data': data})}\n\n"
-
-        return StreamingResponse(
-            _cached_stream(),
-            media_type="text/event-stream",
-            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-        )
-
-    queue: asyncio.Queue = asyncio.Queue()
-
-    async def _progress_callback(pct: int, msg: str):
-        await queue.put({"type": "progress", "pct": pct, "msg": msg})
-
-    async def _run_analysis():
-        try:
-            analyzer = create_analyzer(db)
-            result = await analyzer.analyze(
-                user_query=business_goal,
-                user_id=user_id,
-                progress_callback=_progress_callback,
-            )
-            # Schedule background enrichment
-            _raw_stacks = result["data"].get("recommended_tool_stacks", [])
-            _bottleneck_title = result["data"].get("primary_bottleneck", {}).get("title", "")
-            if _raw_stacks:
-                background_tasks.add_task(
-                    _enrich_stacks_background,
-                    analysis_id=result["data"]["analysis_id"],
-                    raw_stacks=_raw_stacks,
-                    user_query=business_goal,
-                    bottleneck_title=_bottleneck_title,
-                )
-            await queue.put({"type": "result", "data": result["data"]})
-        except Exception as exc:
-            logger.error(f"SSE analysis failed: {exc}", exc_info=True)
-            await queue.put({"type": "error", "message": str(exc)})
-        finally:
-            await queue.put(None)
-
-    async def _generate():
-        task = asyncio.create_task(_run_analysis())
-        try:
-            while True:
-                item = await queue.get()
-                if item is None:
-                    break
-                event_type = item.pop("type")
-                yield f"event: {event_type}\ndata: {json.dumps(item)}\n\n"
-        finally:
-            task.cancel()
-
-    return StreamingResponse(
-        _generate(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
-
-
 @router.delete("/analyses/{analysis_id}")
-async def delete_analysis(
+def delete_analysis(
     analysis_id: int,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -737,7 +607,7 @@ async def delete_analysis(
         db.delete(analysis)
         db.commit()
 
-        logger.info(f"🗑️ Deleted analysis {analysis_id} for user {user_id}")
+        logger.info("🗑️ Deleted analysis %s for user %s", analysis_id, user_id)
 
         return {
             "success": True,
@@ -747,7 +617,7 @@ async def delete_analysis(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Failed to delete analysis {analysis_id}: {e}", exc_info=True)
+        logger.error("❌ Failed to delete analysis %s: %s", analysis_id, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete analysis: {str(e)}"
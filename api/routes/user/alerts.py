@@ -11,7 +11,7 @@ from api.utils.subscription_sync import sync_user_subscription
 
 from typing import Optional, List
 
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, insert
 
 router = APIRouter(tags=["alerts"])
 
@@ -645,21 +645,25 @@ async def mark_all_alerts_read(
     }
 
     now = datetime.utcnow()
+    new_rows = []
     for alert_id in all_alert_ids:
         existing = existing_map.get(alert_id)
         if not existing:
-            db.add(UserAlert(
-                user_id=user.id,
-                alert_id=alert_id,
-                has_viewed=True,
-                is_attended=True,
-                viewed_at=now,
-                chops_earned_from_view=0,
-            ))
+            new_rows.append({
+                "user_id": user.id,
+                "alert_id": alert_id,
+                "has_viewed": True,
+                "is_attended": True,
+                "viewed_at": now,
+                "chops_earned_from_view": 0,
+            })
         elif not existing.has_viewed:
             existing.has_viewed = True
             existing.viewed_at = now
 
+    # One multi-row INSERT instead of an ORM object + INSERT per alert
+    if new_rows:
+        db.execute(insert(UserAlert), new_rows)
     db.commit()
     # Clear all alert cache variants for this user
     await delete_cached(f"alerts:list:{user.id}:all:all:0:100")
@@ -701,19 +705,23 @@ async def backfill_viewed_alerts(
     ]
 
     now = datetime.utcnow()
-    rows = 0
-    for user_id in legacy_ids:
-        for alert_id in all_alert_ids:
-            db.add(UserAlert(
-                user_id=user_id,
-                alert_id=alert_id,
-                has_viewed=True,
-                is_attended=True,
-                viewed_at=now,
-                chops_earned_from_view=0,
-            ))
-            rows += 1
+    new_rows = [
+        {
+            "user_id": user_id,
+            "alert_id": alert_id,
+            "has_viewed": True,
+            "is_attended": True,
+            "viewed_at": now,
+            "chops_earned_from_view": 0,
+        }
+        for user_id in legacy_ids
+        for alert_id in all_alert_ids
+    ]
+    rows = len(new_rows)
 
+    # Batched multi-row INSERTs rather than one ORM object per (user, alert)
+    if new_rows:
+        db.execute(insert(UserAlert), new_rows)
     db.commit()
     return {
         "status": "ok",
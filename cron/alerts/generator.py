@@ -11,15 +11,17 @@ Workflow:
 5. Saves new content only
 """
 
-import json
+import asyncio
 import logging
 import os
 import hashlib
-import requests
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
 
+import httpx
+import orjson
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -28,7 +30,7 @@ load_dotenv('.env.local')
 
 # Import xAI SDK for Grok API with Agent Tools
 try:
-    from xai_sdk import Client
+    from xai_sdk import AsyncClient
     from xai_sdk.chat import user
     from xai_sdk.tools import web_search
     HAS_XAI = True
@@ -39,9 +41,45 @@ except ImportError:
 # Import database models
 from database.pg_connections import SessionLocal, get_db
 from database.pg_models import Insight, Alert
+from cron.content_utils import (
+    connect_dead_url_cache,
+    extract_json,
+    find_paraphrased_titles,
+    is_suspicious_url,
+    normalize_url,
+    remember_dead_urls,
+    skip_known_dead_urls,
+)
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 lets HEAD checks to the same host share one connection; needs the h2 extra
+try:
+    import h2  # noqa: F401
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+
+def _new_url_check_client() -> httpx.AsyncClient:
+    """
+    Keep-alive pool for one run's URL validation, so repeat hosts (techcrunch,
+    bloomberg, ...) skip the TCP/TLS handshake. Opened and closed by
+    run_content_generation.
+    """
+    return httpx.AsyncClient(
+        http2=HAS_H2,
+        timeout=5,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    )
+
+
+def _title_hash(title: str) -> bytes:
+    """Case-insensitive title fingerprint for duplicate checks (16-byte BLAKE2b digest)."""
+    return hashlib.blake2b(title.lower().encode(), digest_size=16).digest()
+
+
 # Configure logging for standalone script execution
 logging.basicConfig(
     level=logging.INFO,
@@ -58,14 +96,23 @@ class AlertsGenerator:
     4. Stores new content in the database
     """
 
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        url_client: httpx.AsyncClient,
+        dead_url_cache: Optional[aioredis.Redis] = None,
+    ):
         """
         Initialize the content generator.
 
         Args:
             db_session: SQLAlchemy database session
+            url_client: HTTP pool for URL validation, owned by the caller
+            dead_url_cache: Redis client for the dead-URL cache, or None to skip it
         """
         self.db = db_session
+        self.url_client = url_client
+        self.dead_url_cache = dead_url_cache
         # Use Grok 4 Fast with reasoning for web search capabilities
         self.model = "grok-4-fast-reasoning"  # Grok 4 Fast (with reasoning)
         self.today = date.today().strftime("%Y-%m-%d")
@@ -77,91 +124,48 @@ class AlertsGenerator:
                 logger.warning("XAI_API_KEY not set in environment variables")
                 self.client = None
             else:
-                self.client = Client(api_key=api_key)
+                self.client = AsyncClient(api_key=api_key)
                 logger.info("xAI Grok client initialized for content generation")
         else:
             self.client = None
             logger.warning("xAI SDK not installed")
 
-    def _get_existing_titles(self, content_type: str) -> set:
+    def _load_existing(self, content_type: str) -> Tuple[set, set, List[str]]:
         """
-        Get existing titles from database to prevent duplicates.
+        Load everything the duplicate checks need with one query over active rows.
 
         Args:
             content_type: 'insight' or 'alert'
 
         Returns:
-            Set of existing title hashes
+            Tuple of (title hashes, normalized URLs, distinct recent titles for the
+            prompt, most recent first)
         """
-        if content_type == 'insight':
-            titles = self.db.query(Insight.title).filter(Insight.is_active == True).all()
-        else:
-            titles = self.db.query(Alert.title).filter(Alert.is_active == True).all()
+        model = Insight if content_type == 'insight' else Alert
+        rows = self.db.query(model.title, model.url).filter(
+            model.is_active == True
+        ).order_by(model.created_at.desc(), model.id.desc()).all()
 
-        # Create hash of titles for efficient comparison
-        return {hashlib.md5(t[0].lower().encode()).hexdigest() for t in titles}
+        title_hashes = {_title_hash(title) for title, _ in rows}
 
-    def _get_existing_title_list(self, content_type: str) -> list:
-        """
-        Get list of existing titles to include in prompt for duplicate prevention.
-
-        Args:
-            content_type: 'insight' or 'alert'
+        urls = {normalize_url(url) for _, url in rows if url}
 
-        Returns:
-            List of existing titles (most recent first)
-        """
-        if content_type == 'insight':
-            titles = self.db.query(Insight.title).filter(
-                Insight.is_active == True
-            ).order_by(Insight.created_at.desc()).limit(30).all()
-        else:
-            titles = self.db.query(Alert.title).filter(
-                Alert.is_active == True
-            ).order_by(Alert.created_at.desc()).limit(30).all()
+        # Order-preserving de-dup: the prompt lists each title once, in a stable order
+        recent_titles = list(dict.fromkeys(title for title, _ in rows[:30]))
 
-        return [t[0] for t in titles]
+        return title_hashes, urls, recent_titles
 
     def _is_duplicate(self, title: str, existing_hashes: set) -> bool:
         """Check if content with similar title already exists."""
-        title_hash = hashlib.md5(title.lower().encode()).hexdigest()
-        return title_hash in existing_hashes
+        return _title_hash(title) in existing_hashes
 
-    def _get_existing_urls(self, content_type: str) -> set:
-        """
-        Get set of existing URLs to prevent same article with different titles.
-
-        Args:
-            content_type: 'insight' or 'alert'
-
-        Returns:
-            Set of normalized URLs
-        """
-        if content_type == 'insight':
-            urls = self.db.query(Insight.url).filter(Insight.is_active == True).all()
-        else:
-            urls = self.db.query(Alert.url).filter(Alert.is_active == True).all()
-
-        # Normalize URLs (remove trailing slashes, query params) for comparison
-        normalized_urls = set()
-        for url_tuple in urls:
-            url = url_tuple[0]
-            if url:  # Skip None URLs
-                # Remove trailing slash
-                url = url.rstrip('/')
-                # Remove query parameters
-                url = url.split('?')[0]
-                normalized_urls.add(url.lower())
-
-        return normalized_urls
-
-    def _is_duplicate_content(self, title: str, url: str, existing_title_hashes: set, existing_urls: set) -> tuple:
+    def _is_duplicate_content(self, title_hash: bytes, normalized_url: str, existing_title_hashes: set, existing_urls: set) -> tuple:
         """
         Check if content is duplicate based on both title AND URL.
 
         Args:
-            title: Content title
-            url: Content URL
+            title_hash: _title_hash of the content title
+            normalized_url: normalize_url of the content URL
             existing_title_hashes: Set of existing title hashes
             existing_urls: Set of existing normalized URLs
 
@@ -169,76 +173,58 @@ class AlertsGenerator:
             Tuple of (is_duplicate: bool, reason: str)
         """
         # Check title duplicate
-        title_hash = hashlib.md5(title.lower().encode()).hexdigest()
         if title_hash in existing_title_hashes:
             return (True, "duplicate title")
 
-        # Check URL duplicate (normalize first)
-        normalized_url = url.rstrip('/').split('?')[0].lower()
+        # Check URL duplicate
         if normalized_url in existing_urls:
             return (True, "duplicate URL")
 
         return (False, None)
 
-    def _is_suspicious_url(self, url: str) -> bool:
-        """
-        Check if URL looks suspicious, fake, or is not a specific article.
-
-        Returns True if URL appears to be fabricated or is a category/homepage.
-        """
-        url_lower = url.lower()
-
-        # Check for obviously fake domains
-        if 'example.com' in url_lower or 'placeholder' in url_lower:
-            return True
-
-        # Check for category/landing pages instead of specific articles
-        category_indicators = [
-            '/category/',
-            '/categories/',
-            '/tag/',
-            '/tags/',
-            '/topic/',
-            '/topics/',
-        ]
-
-        for indicator in category_indicators:
-            if indicator in url_lower:
-                return True
-
-        # Check if URL ends with just a category (no article slug)
-        # e.g., /artificial-intelligence/ or /ai/ or /technology/
-        path_parts = url_lower.rstrip('/').split('/')
-        if len(path_parts) > 0:
-            last_part = path_parts[-1]
-            # If last part is very generic and short, likely a category
-            generic_categories = ['ai', 'tech', 'technology', 'business', 'news',
-                                 'artificial-intelligence', 'machine-learning', 'startup']
-            if last_part in generic_categories:
-                return True
-
-        return False
-
-    def _validate_url_response(self, url: str) -> bool:
+    async def _validate_url_response(self, url: str) -> bool:
         """
         Actually test if URL is accessible via HTTP request.
 
         Returns True if URL returns a valid HTTP status (200-399).
         """
         try:
-            response = requests.head(url, timeout=5, allow_redirects=True)
+            response = await self.url_client.head(url)
             # Accept 200-399 status codes (success and redirects)
             return 200 <= response.status_code < 400
-        except requests.exceptions.Timeout:
-            logger.warning(f"URL validation timeout: {url[:50]}...")
+        except httpx.TimeoutException:
+            logger.warning("URL validation timeout: %.50s...", url)
             return False
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"URL validation failed: {url[:50]}... - {str(e)[:50]}")
+        except httpx.HTTPError as e:
+            logger.warning("URL validation failed: %.50s... - %.50s", url, e)
             return False
         except Exception as e:
-            logger.warning(f"Unexpected error validating URL: {url[:50]}... - {str(e)[:50]}")
+            logger.warning("Unexpected error validating URL: %.50s... - %.50s", url, e)
             return False
 
+    async def _validate_urls(self, urls: List[str]) -> Dict[str, bool]:
+        """
+        HEAD-check all candidate URLs concurrently over the run's connection pool.
+
+        URLs that failed within the last DEAD_URL_TTL_SECONDS are rejected without
+        a request. Returns a map of URL -> accessible, so a batch costs about one
+        request's latency instead of one per URL.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+
+        accessible = dict.fromkeys(unique_urls, False)
+        to_check = await skip_known_dead_urls(self.dead_url_cache, unique_urls)
+
+        results = await asyncio.gather(*(self._validate_url_response(url) for url in to_check))
+        accessible.update(zip(to_check, results))
+
+        await remember_dead_urls(
+            self.dead_url_cache, [url for url, ok in zip(to_check, results) if not ok]
+        )
+        return accessible
+
     async def generate_alerts(self, count: int = 2) -> List[Dict]:
         """
         Generate fresh opportunity alerts by searching the web.
@@ -253,10 +239,8 @@ class AlertsGenerator:
             logger.error("Grok client not initialized")
             return []
 
-        existing_hashes = self._get_existing_titles('alert')
-        existing_titles = self._get_existing_title_list('alert')
-        existing_urls = self._get_existing_urls('alert')
-        logger.info(f"Found {len(existing_hashes)} existing alerts in database")
+        existing_hashes, existing_urls, existing_titles = self._load_existing('alert')
+        logger.info("Found %d existing alerts in database", len(existing_hashes))
 
         # Calculate date range (24-72 hours for opportunities)
         from datetime import timedelta
@@ -345,31 +329,36 @@ Return ONLY the formatted JSON: no intro text, no commentary."""
             ))
             chat.append(user(prompt))
 
-            # Sample response (non-streaming)
-            response = chat.sample()
+            # Sample response (non-streaming); awaited so the event loop stays free
+            response = await chat.sample()
 
             content = response.content.strip() if response.content else ""
 
             # Debug: Log raw response
-            logger.info(f"Raw API response (first 500 chars): {content[:500]}")
+            logger.info("Raw API response (first 500 chars): %.500s", content)
 
-            # Parse JSON response
-            if content.startswith("```"):
-                parts = content.split("```")
-                if len(parts) >= 2:
-                    content = parts[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                    content = content.strip()
-
-            alerts = json.loads(content)
+            # Parse JSON response (tolerates markdown code fences)
+            alerts = orjson.loads(extract_json(content))
 
             if not isinstance(alerts, list):
                 alerts = [alerts]
 
-            # Filter out duplicates and validate URLs
-            new_alerts = []
-            for alert in alerts:
+            # Filter out duplicates and bad URL patterns first; only the survivors
+            # are HTTP-checked, all in one concurrent batch.
+            paraphrased = find_paraphrased_titles(
+                [alert.get('title', 'Unknown') for alert in alerts], existing_titles
+            )
+
+            # Fingerprint every item once, up front; the checks below reuse them
+            title_hashes = [_title_hash(alert.get('title', 'Unknown')) for alert in alerts]
+            normalized_urls = [normalize_url(alert.get('url', '')) for alert in alerts]
+
+            candidates = []
+            batch_urls = set()
+            batch_titles = set()
+            for alert, paraphrase_of, title_hash, normalized_url in zip(
+                alerts, paraphrased, title_hashes, normalized_urls
+            ):
                 title = alert.get('title', 'Unknown')
                 url = alert.get('url', '')
 
@@ -396,40 +385,109 @@ Return ONLY the formatted JSON: no intro text, no commentary."""
 
                 # Enhanced duplicate check (title AND URL)
                 is_duplicate, reason = self._is_duplicate_content(
-                    title, url, existing_hashes, existing_urls
+                    title_hash, normalized_url, existing_hashes, existing_urls
                 )
                 if is_duplicate:
-                    logger.info(f"Skipping {reason}: {title[:50]}... (URL: {url[:50]}...)")
+                    logger.info("Skipping %s: %.50s... (URL: %.50s...)", reason, title, url)
+                    continue
+
+                if paraphrase_of:
+                    logger.info(
+                        "Skipping near-duplicate title: %.50s... (matches: %.50s...)",
+                        title, paraphrase_of,
+                    )
                     continue
 
                 # Validate URL format
                 if not url or not url.startswith('http'):
-                    logger.warning(f"Skipping alert with invalid URL format: {title[:50]}... (URL: {url})")
+                    logger.warning(
+                        "Skipping alert with invalid URL format: %.50s... (URL: %s)", title, url,
+                    )
                     continue
 
                 # Quick pattern validation (check if it's obviously fake)
-                if self._is_suspicious_url(url):
-                    logger.warning(f"Skipping alert with suspicious URL pattern: {title[:50]}... (URL: {url})")
+                if is_suspicious_url(url):
+                    logger.warning(
+                        "Skipping alert with suspicious URL pattern: %.50s... (URL: %s)",
+                        title, url,
+                    )
                     continue
 
-                # HTTP validation - actually test if URL works
-                if not self._validate_url_response(url):
-                    logger.warning(f"Skipping alert with non-accessible URL: {title[:50]}... (URL: {url})")
+                # Grok sometimes returns the same story twice in one response
+                if normalized_url in batch_urls or title_hash in batch_titles:
+                    logger.info(
+                        "Skipping repeat within this batch: %.50s... (URL: %.50s...)", title, url,
+                    )
+                    continue
+                batch_urls.add(normalized_url)
+                batch_titles.add(title_hash)
+
+                candidates.append(alert)
+
+            # HTTP validation - actually test if URLs work
+            accessible = await self._validate_urls([alert['url'] for alert in candidates])
+
+            new_alerts = []
+            for alert in candidates:
+                title = alert.get('title', 'Unknown')
+                url = alert['url']
+                if not accessible[url]:
+                    logger.warning(
+                        "Skipping alert with non-accessible URL: %.50s... (URL: %s)", title, url,
+                    )
                     continue
 
                 new_alerts.append(alert)
-                logger.info(f"✓ Valid alert: {title[:50]}...")
+                logger.info("✓ Valid alert: %.50s...", title)
 
             return new_alerts
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse alerts JSON: {e}")
-            logger.error(f"Raw content: {content[:500]}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse alerts JSON: %s", e)
+            logger.error("Raw content: %.500s", content)
             return []
         except Exception as e:
-            logger.error(f"Error generating alerts: {e}")
+            logger.error("Error generating alerts: %s", e)
             return []
 
+    def _commit_rows(self, rows: list, label: str) -> Tuple[int, int]:
+        """
+        Insert rows in one transaction, falling back to one commit per row if the
+        batch fails so a single bad row only skips itself.
+
+        Returns:
+            Tuple of (saved_count, failed_count)
+        """
+        if not rows:
+            return 0, 0
+
+        # Read titles up front: attributes expire on commit and would reload per row
+        titles = [row.title for row in rows]
+        try:
+            self.db.add_all(rows)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Batch save failed, retrying %ss one by one: %s", label, e)
+        else:
+            for title in titles:
+                logger.info("✅ Saved %s: %.50s...", label, title)
+            return len(rows), 0
+
+        saved = failed = 0
+        for row, title in zip(rows, titles):
+            try:
+                self.db.add(row)
+                self.db.commit()
+                saved += 1
+                logger.info("✅ Saved %s: %.50s...", label, title)
+            except Exception as e:
+                self.db.rollback()
+                logger.error("Failed to save %s: %s", label, e)
+                failed += 1
+
+        return saved, failed
+
     def save_alerts(self, alerts: List[Dict]) -> Tuple[int, int]:
         """
         Save alerts to database.
@@ -440,7 +498,7 @@ Return ONLY the formatted JSON: no intro text, no commentary."""
         Returns:
             Tuple of (saved_count, skipped_count)
         """
-        saved = 0
+        pending = []
         skipped = 0
 
         for alert_data in alerts:
@@ -448,7 +506,10 @@ Return ONLY the formatted JSON: no intro text, no commentary."""
                 # Validate required fields (flexible for new format)
                 required = ['title', 'category', 'why_act_now', 'potential_reward', 'action_required']
                 if not all(alert_data.get(f) for f in required):
-                    logger.warning(f"Skipping alert with missing fields: {alert_data.get('title', 'Unknown')}")
+                    logger.warning(
+                        "Skipping alert with missing fields: %s",
+                        alert_data.get('title', 'Unknown'),
+                    )
                     skipped += 1
                     continue
 
@@ -481,17 +542,14 @@ Return ONLY the formatted JSON: no intro text, no commentary."""
                     total_shares=0
                 )
 
-                self.db.add(alert)
-                self.db.commit()
-                saved += 1
-                logger.info(f"✅ Saved alert: {alert.title[:50]}...")
+                pending.append(alert)
 
             except Exception as e:
-                self.db.rollback()
-                logger.error(f"Failed to save alert: {e}")
+                logger.error("Failed to save alert: %s", e)
                 skipped += 1
 
-        return saved, skipped
+        saved, failed = self._commit_rows(pending, 'alert')
+        return saved, skipped + failed
 
 
 async def run_content_generation(insight_count: int = 3, alert_count: int = 2):
@@ -503,14 +561,16 @@ async def run_content_generation(insight_count: int = 3, alert_count: int = 2):
         alert_count: Number of alerts to generate
     """
     logger.info("=" * 60)
-    logger.info(f"🚀 Starting AI Content Generation - {datetime.now()}")
+    logger.info("🚀 Starting AI Content Generation - %s", datetime.now())
     logger.info("=" * 60)
 
-    # Create database session
+    # Create database session and this run's URL-validation resources
     db = SessionLocal()
+    dead_url_cache = await connect_dead_url_cache()
+    url_client = _new_url_check_client()
 
     try:
-        generator = ContentGenerator(db)
+        generator = ContentGenerator(db, url_client, dead_url_cache)
 
         # Generate and save insights
         logger.info("\n📊 Generating Insights...")
@@ -518,7 +578,7 @@ async def run_content_generation(insight_count: int = 3, alert_count: int = 2):
 
         if insights:
             saved, skipped = generator.save_insights(insights)
-            logger.info(f"Insights: {saved} saved, {skipped} skipped")
+            logger.info("Insights: %d saved, %d skipped", saved, skipped)
         else:
             logger.info("No new insights found")
 
@@ -528,7 +588,7 @@ async def run_content_generation(insight_count: int = 3, alert_count: int = 2):
 
         if alerts:
             saved, skipped = generator.save_alerts(alerts)
-            logger.info(f"Alerts: {saved} saved, {skipped} skipped")
+            logger.info("Alerts: %d saved, %d skipped", saved, skipped)
         else:
             logger.info("No new alerts found")
 
@@ -537,10 +597,13 @@ async def run_content_generation(insight_count: int = 3, alert_count: int = 2):
         logger.info("=" * 60)
 
     except Exception as e:
-        logger.error(f"Content generation failed: {e}")
+        logger.error("Content generation failed: %s", e)
         raise
     finally:
         db.close()
+        await url_client.aclose()
+        if dead_url_cache:
+            await dead_url_cache.aclose()
 
 
 # CLI entry point
@@ -562,17 +625,21 @@ if __name__ == "__main__":
 
 async def run_content_generation(alert_count: int = 2):
     db = SessionLocal()
+    dead_url_cache = await connect_dead_url_cache()
     try:
-        generator = AlertsGenerator(db)
-        logger.info("\n🚨 Generating Opportunity Alerts...")
-        alerts = await generator.generate_alerts(count=alert_count)
-        if alerts:
-            saved, skipped = generator.save_alerts(alerts)
-            logger.info(f"Alerts: {saved} saved, {skipped} skipped")
-        else:
-            logger.info("No new alerts found")
-        logger.info("✅ Content Generation Complete")
+        async with _new_url_check_client() as url_client:
+            generator = AlertsGenerator(db, url_client, dead_url_cache)
+            logger.info("\n🚨 Generating Opportunity Alerts...")
+            alerts = await generator.generate_alerts(count=alert_count)
+            if alerts:
+                saved, skipped = generator.save_alerts(alerts)
+                logger.info("Alerts: %d saved, %d skipped", saved, skipped)
+            else:
+                logger.info("No new alerts found")
+            logger.info("✅ Content Generation Complete")
     except Exception as e:
-        logger.error(f"Failed to generate alerts: {e}")
+        logger.error("Failed to generate alerts: %s", e)
     finally:
         db.close()
+        if dead_url_cache:
+            await dead_url_cache.aclose()
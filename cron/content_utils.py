@@ -0,0 +1,207 @@
+# cron/content_utils.py
+"""
+Helpers shared by the insights and alerts generators.
+
+Both cron jobs parse the same kind of Grok response and run the same
+duplicate and link checks, so the pure pieces live here once instead of
+being pasted into each generator.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# Captures the body of a ```json / ~~~ fenced block anywhere in the response
+_JSON_FENCE_RE = re.compile(r"(?:```|~~~)(?:json)?\s*(.*?)\s*(?:```|~~~)", re.DOTALL)
+
+
+def extract_json(text: str) -> str:
+    """
+    Return the JSON payload of a model response.
+
+    Unwraps a markdown fence if present, then trims any prose around the
+    outermost array or object. Text with no array or object is returned as is,
+    so the caller's JSON decoder reports it.
+    """
+    match = _JSON_FENCE_RE.search(text)
+    if match:
+        text = match.group(1)
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    end = max(text.rfind("]"), text.rfind("}"))
+    if starts and end > min(starts):
+        return text[min(starts):end + 1]
+    return text
+
+
+# Query parameters that select the article itself (?id=123, ?p=456, ?v=abc).
+# Everything else (utm_*, src, guccounter, share ids, ...) is noise for dedup.
+_ARTICLE_PARAMS = frozenset({"id", "p", "v"})
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL for duplicate checks.
+
+    The scheme, "www.", fragment and trailing slash are dropped and the host is
+    lowercased. Only article-selecting query parameters are kept, sorted, so the
+    same article shared two ways compares equal. The path and parameter values
+    keep their case: slugs, YouTube ids and base64 ids are case-sensitive.
+    """
+    parts = urlsplit(url.strip())
+    query = "&".join(sorted(
+        param for param in parts.query.split("&")
+        if param.partition("=")[0].lower() in _ARTICLE_PARAMS
+    ))
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+# Fake domains and category/tag/topic landing pages, in one scan of the lowercased URL
+SUSPICIOUS_URL_RE = re.compile(r"example\.com|placeholder|/(?:category|categories|tags?|topics?)/")
+
+# A URL whose last path segment is one of these is a section page, not an article
+GENERIC_CATEGORIES = frozenset({
+    "ai", "tech", "technology", "business", "news",
+    "artificial-intelligence", "machine-learning", "startup",
+})
+
+
+def is_suspicious_url(url: str) -> bool:
+    """
+    Check if URL looks suspicious, fake, or is not a specific article.
+
+    Returns True if URL appears to be fabricated or is a category/homepage.
+    """
+    url_lower = url.lower()
+    if SUSPICIOUS_URL_RE.search(url_lower):
+        return True
+    # e.g. /artificial-intelligence/ or /ai/ with no article slug after it
+    return url_lower.rstrip("/").rpartition("/")[2] in GENERIC_CATEGORIES
+
+
+# Links that failed validation are remembered in Redis across cron runs (each run
+# is a fresh process), so a dead URL Grok repeats does not cost another timeout.
+DEAD_URL_TTL_SECONDS = 3600
+
+
+async def connect_dead_url_cache() -> aioredis.Redis | None:
+    """Connect to Redis for one run; None if REDIS_URL is unset or unreachable."""
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    client = aioredis.from_url(redis_url, socket_connect_timeout=5)
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning("Dead-URL cache disabled, Redis unavailable: %s", e)
+        await client.aclose()
+        return None
+    return client
+
+
+def dead_url_key(url: str) -> str:
+    """Redis key for a URL, shared by every spelling that normalizes the same."""
+    return "deadurl:" + hashlib.blake2b(normalize_url(url).encode(), digest_size=16).hexdigest()
+
+
+async def skip_known_dead_urls(cache: aioredis.Redis | None, urls: list[str]) -> list[str]:
+    """
+    Drop URLs that failed validation within the last DEAD_URL_TTL_SECONDS.
+
+    One MGET for the whole batch. Without a cache, or if the lookup fails, every
+    URL is returned so it still gets checked.
+    """
+    if not cache or not urls:
+        return urls
+    try:
+        known_dead = await cache.mget([dead_url_key(url) for url in urls])
+    except Exception as e:
+        logger.warning("Dead-URL cache lookup failed: %s", e)
+        return urls
+    to_check = []
+    for url, dead in zip(urls, known_dead, strict=True):
+        if dead:
+            logger.info("Known dead URL, skipping request: %.50s...", url)
+        else:
+            to_check.append(url)
+    return to_check
+
+
+async def remember_dead_urls(cache: aioredis.Redis | None, urls: list[str]) -> None:
+    """SETEX each newly dead URL in one pipeline; a failed write is only logged."""
+    if not cache or not urls:
+        return
+    try:
+        async with cache.pipeline(transaction=False) as pipe:
+            for url in urls:
+                pipe.setex(dead_url_key(url), DEAD_URL_TTL_SECONDS, 1)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Dead-URL cache update failed: %s", e)
+
+
+# Titles at least this similar (cosine) to a recent one are the same story reworded.
+# With MiniLM, rewordings of one headline score about 0.9 and different stories on
+# the same topic stay under about 0.8. Override with CONTENT_PARAPHRASE_THRESHOLD.
+SEMANTIC_DUPLICATE_THRESHOLD = float(os.getenv("CONTENT_PARAPHRASE_THRESHOLD", "0.88"))
+
+_title_embedder = None
+_title_embedder_loaded = False
+
+
+def get_title_embedder():
+    """
+    The recommender's MiniLM model, imported on first use so the cron jobs load
+    it once and only when a batch needs it. None if it cannot be loaded.
+    """
+    global _title_embedder, _title_embedder_loaded
+    if not _title_embedder_loaded:
+        _title_embedder_loaded = True
+        try:
+            from decision_engine.recommender_db import model
+            _title_embedder = model
+        except Exception as e:
+            logger.warning("Semantic duplicate check disabled: %s", e)
+    return _title_embedder
+
+
+def find_paraphrased_titles(
+    titles: list[str],
+    recent_titles: list[str],
+    embedder=None,
+    threshold: float = SEMANTIC_DUPLICATE_THRESHOLD,
+) -> list[str | None]:
+    """
+    Catch reworded repeats that the exact title hash misses.
+
+    Args:
+        titles: Candidate titles from the Grok response
+        recent_titles: Most recent existing titles
+        embedder: Model with a sentence-transformers encode(); defaults to get_title_embedder()
+        threshold: Minimum cosine similarity to count as a paraphrase
+
+    Returns:
+        For each candidate, the recent title it paraphrases, or None
+    """
+    if not titles or not recent_titles:
+        return [None] * len(titles)
+    embedder = embedder or get_title_embedder()
+    if embedder is None:
+        return [None] * len(titles)
+
+    # One encode call for both sides; unit vectors make the dot product the cosine
+    vectors = embedder.encode(
+        titles + recent_titles, convert_to_numpy=True, normalize_embeddings=True
+    )
+    similarities = vectors[:len(titles)] @ vectors[len(titles):].T
+    best = similarities.argmax(axis=1)
+    return [
+        recent_titles[j] if similarities[i, j] >= threshold else None
+        for i, j in enumerate(best)
+    ]
@@ -11,15 +11,17 @@ Workflow:
 5. Saves new content only
 """
 
-import json
+import asyncio
 import logging
 import os
 import hashlib
-import requests
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
 
+import httpx
+import orjson
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -28,7 +30,7 @@ load_dotenv('.env.local')
 
 # Import xAI SDK for Grok API with Agent Tools
 try:
-    from xai_sdk import Client
+    from xai_sdk import AsyncClient
     from xai_sdk.chat import user
     from xai_sdk.tools import web_search
     HAS_XAI = True
@@ -39,9 +41,45 @@ except ImportError:
 # Import database models
 from database.pg_connections import SessionLocal, get_db
 from database.pg_models import Insight, Alert
+from cron.content_utils import (
+    connect_dead_url_cache,
+    extract_json,
+    find_paraphrased_titles,
+    is_suspicious_url,
+    normalize_url,
+    remember_dead_urls,
+    skip_known_dead_urls,
+)
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 lets HEAD checks to the same host share one connection; needs the h2 extra
+try:
+    import h2  # noqa: F401
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+
+def _new_url_check_client() -> httpx.AsyncClient:
+    """
+    Keep-alive pool for one run's URL validation, so repeat hosts (techcrunch,
+    bloomberg, ...) skip the TCP/TLS handshake. Opened and closed by
+    run_content_generation.
+    """
+    return httpx.AsyncClient(
+        http2=HAS_H2,
+        timeout=5,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    )
+
+
+def _title_hash(title: str) -> bytes:
+    """Case-insensitive title fingerprint for duplicate checks (16-byte BLAKE2b digest)."""
+    return hashlib.blake2b(title.lower().encode(), digest_size=16).digest()
+
+
 # Configure logging for standalone script execution
 logging.basicConfig(
     level=logging.INFO,
@@ -58,14 +96,23 @@ class InsightsGenerator:
     4. Stores new content in the database
     """
 
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        url_client: httpx.AsyncClient,
+        dead_url_cache: Optional[aioredis.Redis] = None,
+    ):
         """
         Initialize the content generator.
 
         Args:
             db_session: SQLAlchemy database session
+            url_client: HTTP pool for URL validation, owned by the caller
+            dead_url_cache: Redis client for the dead-URL cache, or None to skip it
         """
         self.db = db_session
+        self.url_client = url_client
+        self.dead_url_cache = dead_url_cache
         # Use Grok 4 Fast with reasoning for web search capabilities
         self.model = "grok-4-fast-reasoning"  # Grok 4 Fast (with reasoning)
         self.today = date.today().strftime("%Y-%m-%d")
@@ -77,91 +124,48 @@ class InsightsGenerator:
                 logger.warning("XAI_API_KEY not set in environment variables")
                 self.client = None
             else:
-                self.client = Client(api_key=api_key)
+                self.client = AsyncClient(api_key=api_key)
                 logger.info("xAI Grok client initialized for content generation")
         else:
             self.client = None
             logger.warning("xAI SDK not installed")
 
-    def _get_existing_titles(self, content_type: str) -> set:
+    def _load_existing(self, content_type: str) -> Tuple[set, set, List[str]]:
         """
-        Get existing titles from database to prevent duplicates.
+        Load everything the duplicate checks need with one query over active rows.
 
         Args:
             content_type: 'insight' or 'alert'
 
         Returns:
-            Set of existing title hashes
+            Tuple of (title hashes, normalized URLs, distinct recent titles for the
+            prompt, most recent first)
         """
-        if content_type == 'insight':
-            titles = self.db.query(Insight.title).filter(Insight.is_active == True).all()
-        else:
-            titles = self.db.query(Alert.title).filter(Alert.is_active == True).all()
+        model = Insight if content_type == 'insight' else Alert
+        rows = self.db.query(model.title, model.url).filter(
+            model.is_active == True
+        ).order_by(model.created_at.desc(), model.id.desc()).all()
 
-        # Create hash of titles for efficient comparison
-        return {hashlib.md5(t[0].lower().encode()).hexdigest() for t in titles}
+        title_hashes = {_title_hash(title) for title, _ in rows}
 
-    def _get_existing_title_list(self, content_type: str) -> list:
-        """
-        Get list of existing titles to include in prompt for duplicate prevention.
+        urls = {normalize_url(url) for _, url in rows if url}
 
-        Args:
-            content_type: 'insight' or 'alert'
-
-        Returns:
-            List of existing titles (most recent first)
-        """
-        if content_type == 'insight':
-            titles = self.db.query(Insight.title).filter(
-                Insight.is_active == True
-            ).order_by(Insight.created_at.desc()).limit(30).all()
-        else:
-            titles = self.db.query(Alert.title).filter(
-                Alert.is_active == True
-            ).order_by(Alert.created_at.desc()).limit(30).all()
+        # Order-preserving de-dup: the prompt lists each title once, in a stable order
+        recent_titles = list(dict.fromkeys(title for title, _ in rows[:30]))
 
-        return [t[0] for t in titles]
+        return title_hashes, urls, recent_titles
 
     def _is_duplicate(self, title: str, existing_hashes: set) -> bool:
         """Check if content with similar title already exists."""
-        title_hash = hashlib.md5(title.lower().encode()).hexdigest()
-        return title_hash in existing_hashes
-
-    def _get_existing_urls(self, content_type: str) -> set:
-        """
-        Get set of existing URLs to prevent same article with different titles.
+        return _title_hash(title) in existing_hashes
 
-        Args:
-            content_type: 'insight' or 'alert'
-
-        Returns:
-            Set of normalized URLs
-        """
-        if content_type == 'insight':
-            urls = self.db.query(Insight.url).filter(Insight.is_active == True).all()
-        else:
-            urls = self.db.query(Alert.url).filter(Alert.is_active == True).all()
-
-        # Normalize URLs (remove trailing slashes, query params) for comparison
-        normalized_urls = set()
-        for url_tuple in urls:
-            url = url_tuple[0]
-            if url:  # Skip None URLs
-                # Remove trailing slash
-                url = url.rstrip('/')
-                # Remove query parameters
-                url = url.split('?')[0]
-                normalized_urls.add(url.lower())
-
-        return normalized_urls
-
-    def _is_duplicate_content(self, title: str, url: str, existing_title_hashes: set, existing_urls: set) -> tuple:
+    def _is_duplicate_content(self, title_hash: bytes, normalized_url: str, existing_title_hashes: set, existing_urls: set) -> tuple:
         """
         Check if content is duplicate based on both title AND URL.
 
         Args:
-            title: Content title
-            url: Content URL
+            title_hash: _title_hash of the content title
+            normalized_url: normalize_url of the content URL
             existing_title_hashes: Set of existing title hashes
             existing_urls: Set of existing normalized URLs
 
@@ -169,76 +173,58 @@ class InsightsGenerator:
             Tuple of (is_duplicate: bool, reason: str)
         """
         # Check title duplicate
-        title_hash = hashlib.md5(title.lower().encode()).hexdigest()
         if title_hash in existing_title_hashes:
             return (True, "duplicate title")
 
-        # Check URL duplicate (normalize first)
-        normalized_url = url.rstrip('/').split('?')[0].lower()
+        # Check URL duplicate
         if normalized_url in existing_urls:
             return (True, "duplicate URL")
 
         return (False, None)
 
-    def _is_suspicious_url(self, url: str) -> bool:
-        """
-        Check if URL looks suspicious, fake, or is not a specific article.
-
-        Returns True if URL appears to be fabricated or is a category/homepage.
-        """
-        url_lower = url.lower()
-
-        # Check for obviously fake domains
-        if 'example.com' in url_lower or 'placeholder' in url_lower:
-            return True
-
-        # Check for category/landing pages instead of specific articles
-        category_indicators = [
-            '/category/',
-            '/categories/',
-            '/tag/',
-            '/tags/',
-            '/topic/',
-            '/topics/',
-        ]
-
-        for indicator in category_indicators:
-            if indicator in url_lower:
-                return True
-
-        # Check if URL ends with just a category (no article slug)
-        # e.g., /artificial-intelligence/ or /ai/ or /technology/
-        path_parts = url_lower.rstrip('/').split('/')
-        if len(path_parts) > 0:
-            last_part = path_parts[-1]
-            # If last part is very generic and short, likely a category
-            generic_categories = ['ai', 'tech', 'technology', 'business', 'news',
-                                 'artificial-intelligence', 'machine-learning', 'startup']
-            if last_part in generic_categories:
-                return True
-
-        return False
-
-    def _validate_url_response(self, url: str) -> bool:
+    async def _validate_url_response(self, url: str) -> bool:
         """
         Actually test if URL is accessible via HTTP request.
 
         Returns True if URL returns a valid HTTP status (200-399).
         """
         try:
-            response = requests.head(url, timeout=5, allow_redirects=True)
+            response = await self.url_client.head(url)
             # Accept 200-399 status codes (success and redirects)
             return 200 <= response.status_code < 400
-        except requests.exceptions.Timeout:
-            logger.warning(f"URL validation timeout: {url[:50]}...")
+        except httpx.TimeoutException:
+            logger.warning("URL validation timeout: %.50s...", url)
             return False
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"URL validation failed: {url[:50]}... - {str(e)[:50]}")
+        except httpx.HTTPError as e:
+            logger.warning("URL validation failed: %.50s... - %.50s", url, e)
             return False
         except Exception as e:
-            logger.warning(f"Unexpected error validating URL: {url[:50]}... - {str(e)[:50]}")
+            logger.warning("Unexpected error validating URL: %.50s... - %.50s", url, e)
             return False
 
+    async def _validate_urls(self, urls: List[str]) -> Dict[str, bool]:
+        """
+        HEAD-check all candidate URLs concurrently over the run's connection pool.
+
+        URLs that failed within the last DEAD_URL_TTL_SECONDS are rejected without
+        a request. Returns a map of URL -> accessible, so a batch costs about one
+        request's latency instead of one per URL.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+
+        accessible = dict.fromkeys(unique_urls, False)
+        to_check = await skip_known_dead_urls(self.dead_url_cache, unique_urls)
+
+        results = await asyncio.gather(*(self._validate_url_response(url) for url in to_check))
+        accessible.update(zip(to_check, results))
+
+        await remember_dead_urls(
+            self.dead_url_cache, [url for url, ok in zip(to_check, results) if not ok]
+        )
+        return accessible
+
     async def generate_insights(self, count: int = 3) -> List[Dict]:
         """
         Generate fresh AI/Business insights by searching the web.
@@ -253,10 +239,8 @@ class InsightsGenerator:
             logger.error("Grok client not initialized")
             return []
 
-        existing_hashes = self._get_existing_titles('insight')
-        existing_titles = self._get_existing_title_list('insight')
-        existing_urls = self._get_existing_urls('insight')
-        logger.info(f"Found {len(existing_hashes)} existing insights in database")
+        existing_hashes, existing_urls, existing_titles = self._load_existing('insight')
+        logger.info("Found %d existing insights in database", len(existing_hashes))
 
         # Calculate date range (24 hours)
         from datetime import timedelta
@@ -331,32 +315,36 @@ Return only the JSON. No commentary, no explanation. Deliver pure gold at speed.
             ))
             chat.append(user(prompt))
 
-            # Sample response (non-streaming)
-            response = chat.sample()
+            # Sample response (non-streaming); awaited so the event loop stays free
+            response = await chat.sample()
 
             content = response.content.strip() if response.content else ""
 
             # Debug: Log raw response
-            logger.info(f"Raw API response (first 500 chars): {content[:500]}")
-
-            # Parse JSON response
-            # Handle potential markdown code blocks
-            if content.startswith("```"):
-                parts = content.split("```")
-                if len(parts) >= 2:
-                    content = parts[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                    content = content.strip()
+            logger.info("Raw API response (first 500 chars): %.500s", content)
 
-            insights = json.loads(content)
+            # Parse JSON response (tolerates markdown code fences)
+            insights = orjson.loads(extract_json(content))
 
             if not isinstance(insights, list):
                 insights = [insights]
 
-            # Filter out duplicates and validate URLs
-            new_insights = []
-            for insight in insights:
+            # Filter out duplicates and bad URL patterns first; only the survivors
+            # are HTTP-checked, all in one concurrent batch.
+            paraphrased = find_paraphrased_titles(
+                [insight.get('title', 'Unknown') for insight in insights], existing_titles
+            )
+
+            # Fingerprint every item once, up front; the checks below reuse them
+            title_hashes = [_title_hash(insight.get('title', 'Unknown')) for insight in insights]
+            normalized_urls = [normalize_url(insight.get('url', '')) for insight in insights]
+
+            candidates = []
+            batch_urls = set()
+            batch_titles = set()
+            for insight, paraphrase_of, title_hash, normalized_url in zip(
+                insights, paraphrased, title_hashes, normalized_urls
+            ):
                 title = insight.get('title', 'Unknown')
                 url = insight.get('url', '')
 
@@ -371,40 +359,109 @@ Return only the JSON. No commentary, no explanation. Deliver pure gold at speed.
 
                 # Enhanced duplicate check (title AND URL)
                 is_duplicate, reason = self._is_duplicate_content(
-                    title, url, existing_hashes, existing_urls
+                    title_hash, normalized_url, existing_hashes, existing_urls
                 )
                 if is_duplicate:
-                    logger.info(f"Skipping {reason}: {title[:50]}... (URL: {url[:50]}...)")
+                    logger.info("Skipping %s: %.50s... (URL: %.50s...)", reason, title, url)
+                    continue
+
+                if paraphrase_of:
+                    logger.info(
+                        "Skipping near-duplicate title: %.50s... (matches: %.50s...)",
+                        title, paraphrase_of,
+                    )
                     continue
 
                 # Validate URL format
                 if not url or not url.startswith('http'):
-                    logger.warning(f"Skipping insight with invalid URL format: {title[:50]}... (URL: {url})")
+                    logger.warning(
+                        "Skipping insight with invalid URL format: %.50s... (URL: %s)", title, url,
+                    )
                     continue
 
                 # Quick pattern validation (check if it's obviously fake)
-                if self._is_suspicious_url(url):
-                    logger.warning(f"Skipping insight with suspicious URL pattern: {title[:50]}... (URL: {url})")
+                if is_suspicious_url(url):
+                    logger.warning(
+                        "Skipping insight with suspicious URL pattern: %.50s... (URL: %s)",
+                        title, url,
+                    )
+                    continue
+
+                # Grok sometimes returns the same story twice in one response
+                if normalized_url in batch_urls or title_hash in batch_titles:
+                    logger.info(
+                        "Skipping repeat within this batch: %.50s... (URL: %.50s...)", title, url,
+                    )
                     continue
+                batch_urls.add(normalized_url)
+                batch_titles.add(title_hash)
+
+                candidates.append(insight)
+
+            # HTTP validation - actually test if URLs work
+            accessible = await self._validate_urls([insight['url'] for insight in candidates])
 
-                # HTTP validation - actually test if URL works
-                if not self._validate_url_response(url):
-                    logger.warning(f"Skipping insight with non-accessible URL: {title[:50]}... (URL: {url})")
+            new_insights = []
+            for insight in candidates:
+                title = insight.get('title', 'Unknown')
+                url = insight['url']
+                if not accessible[url]:
+                    logger.warning(
+                        "Skipping insight with non-accessible URL: %.50s... (URL: %s)", title, url,
+                    )
                     continue
 
                 new_insights.append(insight)
-                logger.info(f"✓ Valid insight: {title[:50]}...")
+                logger.info("✓ Valid insight: %.50s...", title)
 
             return new_insights
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse insights JSON: {e}")
-            logger.error(f"Raw content: {content[:500]}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse insights JSON: %s", e)
+            logger.error("Raw content: %.500s", content)
             return []
         except Exception as e:
-            logger.error(f"Error generating insights: {e}")
+            logger.error("Error generating insights: %s", e)
             return []
 
+    def _commit_rows(self, rows: list, label: str) -> Tuple[int, int]:
+        """
+        Insert rows in one transaction, falling back to one commit per row if the
+        batch fails so a single bad row only skips itself.
+
+        Returns:
+            Tuple of (saved_count, failed_count)
+        """
+        if not rows:
+            return 0, 0
+
+        # Read titles up front: attributes expire on commit and would reload per row
+        titles = [row.title for row in rows]
+        try:
+            self.db.add_all(rows)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Batch save failed, retrying %ss one by one: %s", label, e)
+        else:
+            for title in titles:
+                logger.info("✅ Saved %s: %.50s...", label, title)
+            return len(rows), 0
+
+        saved = failed = 0
+        for row, title in zip(rows, titles):
+            try:
+                self.db.add(row)
+                self.db.commit()
+                saved += 1
+                logger.info("✅ Saved %s: %.50s...", label, title)
+            except Exception as e:
+                self.db.rollback()
+                logger.error("Failed to save %s: %s", label, e)
+                failed += 1
+
+        return saved, failed
+
     def save_insights(self, insights: List[Dict]) -> Tuple[int, int]:
         """
         Save insights to database.
@@ -415,7 +472,7 @@ Return only the JSON. No commentary, no explanation. Deliver pure gold at speed.
         Returns:
             Tuple of (saved_count, skipped_count)
         """
-        saved = 0
+        pending = []
         skipped = 0
 
         for insight_data in insights:
@@ -423,7 +480,10 @@ Return only the JSON. No commentary, no explanation. Deliver pure gold at speed.
                 # Validate required fields (impact_score is optional for backwards compatibility)
                 required = ['title', 'category', 'what_changed', 'why_it_matters', 'action_to_take']
                 if not all(insight_data.get(f) for f in required):
-                    logger.warning(f"Skipping insight with missing fields: {insight_data.get('title', 'Unknown')}")
+                    logger.warning(
+                        "Skipping insight with missing fields: %s",
+                        insight_data.get('title', 'Unknown'),
+                    )
                     skipped += 1
                     continue
 
@@ -445,32 +505,33 @@ Return only the JSON. No commentary, no explanation. Deliver pure gold at speed.
                     total_shares=0
                 )
 
-                self.db.add(insight)
-                self.db.commit()
-                saved += 1
-                logger.info(f"✅ Saved insight: {insight.title[:50]}...")
+                pending.append(insight)
 
             except Exception as e:
-                self.db.rollback()
-                logger.error(f"Failed to save insight: {e}")
+                logger.error("Failed to save insight: %s", e)
                 skipped += 1
 
-        return saved, skipped
+        saved, failed = self._commit_rows(pending, 'insight')
+        return saved, skipped + failed
 
 
 async def run_content_generation(insight_count: int = 3):
     db = SessionLocal()
+    dead_url_cache = await connect_dead_url_cache()
     try:
-        generator = InsightsGenerator(db)
-        logger.info("\n📊 Generating Insights...")
-        insights = await generator.generate_insights(count=insight_count)
-        if insights:
-            saved, skipped = generator.save_insights(insights)
-            logger.info(f"Insights: {saved} saved, {skipped} skipped")
-        else:
-            logger.info("No new insights found")
-        logger.info("✅ Content Generation Complete")
+        async with _new_url_check_client() as url_client:
+            generator = InsightsGenerator(db, url_client, dead_url_cache)
+            logger.info("\n📊 Generating Insights...")
+            insights = await generator.generate_insights(count=insight_count)
+            if insights:
+                saved, skipped = generator.save_insights(insights)
+                logger.info("Insights: %d saved, %d skipped", saved, skipped)
+            else:
+                logger.info("No new insights found")
+            logger.info("✅ Content Generation Complete")
     except Exception as e:
-        logger.error(f"Failed to generate insights: {e}")
+        logger.error("Failed to generate insights: %s", e)
     finally:
         db.close()
+        if dead_url_cache:
+            await dead_url_cache.aclose()
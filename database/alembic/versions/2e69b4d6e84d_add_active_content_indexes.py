@@ -0,0 +1,40 @@
+"""add partial recency indexes for active insights and alerts
+
+Revision ID: 2e69b4d6e84d
+Revises: 80725524ba7b
+Create Date: 2026-10-18 11:02:17.304851
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e69b4d6e84d'
+down_revision: Union[str, Sequence[str], None] = '80725524ba7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ('insights', 'alerts')
+
+
+def upgrade() -> None:
+    """Index active rows by recency for the content generators' dedup query."""
+    # CONCURRENTLY cannot run inside a transaction, and avoids locking out the
+    # cron writers and the feed readers while the index builds.
+    with op.get_context().autocommit_block():
+        for table in _TABLES:
+            # Serves WHERE is_active ORDER BY created_at DESC, id DESC
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_active_created_idx
+                ON {table} (created_at DESC, id DESC)
+                WHERE is_active
+            """)
+
+
+def downgrade() -> None:
+    """Remove the active-row recency indexes from insights and alerts."""
+    with op.get_context().autocommit_block():
+        for table in _TABLES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {table}_active_created_idx')
@@ -4,8 +4,8 @@ LAVOO Agentic Business Analyzer
 AI-powered business analysis with bottleneck identification and strategic planning.
 
 Architecture:
-- Stage 1: Primary Bottleneck Agent (identifies THE critical constraint + consequences)
-- Stage 2: Secondary Constraints Agent (finds 2-4 supporting issues)
+- Stage 1: Diagnosis Agent (THE critical constraint + consequences, and 2-4 supporting
+  issues, in one call)
 - Stage 3: Action Plans Agent (generates ranked, leveraged action plans with toolkits)
 - Stage 3B: Automation Stack Agent (composes multi-tool stacks from DB, LLM-enriched)
 - Stage 4: Roadmap & Execution Agent (creates timeline + motivational quote)
@@ -23,32 +23,415 @@ OUTPUT FORMAT:
 """
 
 import asyncio
-import json
 import logging
-import os
+import random
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
 
-from dotenv import load_dotenv
+import orjson
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from decision_engine.grok_client import (
+    REQUEST_REJECTED,
+    TRANSIENT_ERRORS,
+    get_client,
+    get_grok_slots,
+)
 from decision_engine.recommender_db import recommend_automation_stacks, recommend_tools
+from decision_engine.stage_cache import stage_cache, stage_key
 
-load_dotenv(".env.local")
+logger = logging.getLogger(__name__)
 
-try:
-    from openai import OpenAI
-except ImportError as exc:
-    raise RuntimeError(
-        "openai package not installed — run: uv pip install openai"
-    ) from exc
+# Transient Grok failures are retried with capped, jittered exponential backoff.
+_LLM_ATTEMPTS = 3
+_LLM_BACKOFF_INITIAL = 1.0
+_LLM_BACKOFF_MAX = 10.0
+
+# BusinessAnalysis columns that hold JSON-encoded text
+_JSON_COLUMNS = frozenset({
+    "primary_bottleneck",
+    "secondary_constraints",
+    "action_plans",
+    "recommended_tool_stacks",
+    "execution_roadmap",
+})
+
+# Toolkit selection only needs a one-line summary of each candidate tool.
+_TOOLKIT_DESCRIPTION_CHARS = 100
+
+# Stack enrichment sends up to this many stacks per request, each with room for
+# about 700 output tokens, so one response never needs more than ~2.1k tokens.
+_ENRICHMENT_BATCH_SIZE = 3
+_ENRICHMENT_TOKENS_PER_STACK = 700
+
+# Below this cosine similarity (MiniLM) no candidate is relevant enough to be
+# worth a selection call; the plan simply gets no toolkit. all-MiniLM-L6-v2 puts
+# unrelated sentence pairs at roughly 0.0-0.15 and a tool description on the
+# action's subject at 0.3 and up, so 0.2 only drops candidates that are all noise.
+_TOOLKIT_MIN_SIMILARITY = 0.2
+
+# Every stage asks Grok for a single JSON object; JSON mode guarantees it parses.
+_JSON_OBJECT = {"type": "json_object"}
+
+# Names of strict schemas the API has refused this process; their calls go
+# straight to JSON mode (every prompt also spells out its output shape).
+_REJECTED_SCHEMAS: set = set()
+
+
+def _json_schema(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict structured-output format: every property required, nothing extra."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+# Fixed-shape outputs use a schema so decoding stops the moment the object is
+# complete — no preamble, no trailing prose, no stray extra keys to pay for.
+_TOOLKIT_FORMAT = _json_schema("toolkit_selection", {
+    "selected_tool_index": {"type": ["integer", "null"]},
+    "toolkit": {
+        "anyOf": [
+            _object({"tool_name": _STRING, "what_it_helps": _STRING, "why_this_tool": _STRING}),
+            {"type": "null"},
+        ]
+    },
+})
+
+_STACK_ENRICHMENT_FORMAT = _json_schema("stack_enrichment", {
+    "stacks": {
+        "type": "array",
+        "items": _object({
+            "stack_id": {"type": "integer"},
+            "stack_name": _STRING,
+            "workflow_summary": _STRING,
+            "automation_logic": _STRING,
+            "tool_roles": {
+                "type": "array",
+                "items": _object({"tool_name": _STRING, "role": _STRING, "hands_off_to": _STRING}),
+            },
+            "setup_order": {
+                "type": "array",
+                "items": _object({
+                    "position": {"type": "integer"},
+                    "tool_name": _STRING,
+                    "why": _STRING,
+                }),
+            },
+        }),
+    },
+})
 
-logger = logging.getLogger(__name__)
+_ROADMAP_FORMAT = _json_schema("execution_roadmap", {
+    "total_phases": {"type": "integer"},
+    "estimated_days": {"type": "integer"},
+    "execution_roadmap": {
+        "type": "array",
+        "items": _object({
+            "phase": _STRING,
+            "days": {"type": "integer"},
+            "title": _STRING,
+            "tasks": _STRING_LIST,
+        }),
+    },
+    "motivational_quote": _STRING,
+})
+
+
+class RoadmapPhase(BaseModel):
+    phase: str
+    days: int
+    title: str
+    tasks: List[str]
+
+
+class RoadmapResponse(BaseModel):
+    """Typed Stage 4 contract; parsed and validated in one pydantic-core pass."""
+
+    total_phases: int
+    estimated_days: int
+    execution_roadmap: List[RoadmapPhase]
+    motivational_quote: str
+
+
+# Static stage instructions go in the system message and per-analysis data in the
+# user message, so every request shares a byte-identical prefix that xAI can serve
+# from its prompt cache instead of re-prefilling.
+
+_DIAGNOSIS_SYSTEM_PROMPT = """You are an elite business consultant analyzing a user's business challenge.
+
+Your task, for the user query you are given:
+A. Identify THE SINGLE most critical bottleneck blocking their success.
+B. Identify 2-4 SECONDARY constraints that compound that primary issue.
+
+CRITICAL RULES — PRIMARY BOTTLENECK:
+1. Identify ONLY ONE primary bottleneck (not 3-5, just ONE)
+2. The bottleneck must be the ROOT CAUSE, not a symptom
+3. Describe what's ACTUALLY broken in simple terms
+4. Explain the consequence if they ignore this (be specific and impactful)
+5. Identify the strategic priority (what they should focus on)
+6. Identify ONE critical action they must STOP doing (wastes time/resources)
+
+CRITICAL RULES — SECONDARY CONSTRAINTS:
+1. These are NOT as critical as the primary bottleneck
+2. They should be related but distinct issues
+3. Keep descriptions brief and actionable
+4. Order by impact (most impactful first)
+5. If the user's situation is simple, return only 2 constraints
+6. Maximum 4 constraints
+
+OUTPUT FORMAT (JSON):
+{
+    "primary_bottleneck": {
+        "title": "Clear, concise title (5-10 words)",
+        "description": "What's actually broken (2-3 sentences, be direct)",
+        "consequence": "Specific consequence if ignored (1-2 sentences, make it real)"
+    },
+    "strategic_priority": "The ONE thing they should focus on (1 sentence)",
+    "what_to_stop": "The ONE action they must stop immediately (1 sentence, be direct)",
+    "secondary_constraints": [
+        {
+            "id": 1,
+            "title": "Brief title (5-8 words)",
+            "description": "What's the issue (1-2 sentences)"
+        },
+        {
+            "id": 2,
+            "title": "Brief title (5-8 words)",
+            "description": "What's the issue (1-2 sentences)"
+        }
+    ]
+}
+
+Think like a consultant who charges $500/hour. Be brutally honest, specific, and actionable."""
+
+_ACTION_PLANS_SYSTEM_PROMPT = """You are an elite business strategist creating an action plan.
+
+Your task: Given the user query, primary bottleneck and secondary constraints, create 3-5 RANKED action plans that solve the primary bottleneck.
+
+CRITICAL RULES:
+1. Order by LEVERAGE (highest impact first, not chronological)
+2. Each action must directly address the primary bottleneck
+3. "what_to_do" = a LIST of clear, executable steps (complete, meaningful sentences)
+4. "why_it_matters" = a LIST of business impact/reasoning points (complete, meaningful sentences)
+5. "effort_level" = Low, Medium, or High
+6. "needs_ai_tool" = true if AI automation could significantly help, false otherwise
+7. Maximum 5 action plans
+8. Include an "exclusions_note" explaining what you intentionally excluded
+
+OUTPUT FORMAT (JSON):
+{
+    "action_plans": [
+        {
+            "id": 1,
+            "title": "Action title (5-10 words)",
+            "what_to_do": ["Step 1", "Step 2"],
+            "why_it_matters": ["Impact 1"],
+            "effort_level": "Low",
+            "needs_ai_tool": false
+        }
+    ],
+    "exclusions_note": "What strategies you excluded and why (2-3 sentences)"
+}
+
+Be practical and specific."""
+
+_TOOLKIT_SYSTEM_PROMPT = """You are selecting the best AI tool for a specific action.
+
+You are given the ACTION, WHAT TO DO, and the AVAILABLE TOOLS from semantic search,
+one per line as index|name|summary.
+
+Your task: Pick the BEST tool for this action, or return null if none are good fits.
+
+OUTPUT FORMAT (JSON):
+{
+    "selected_tool_index": 0 or null,
+    "toolkit": {
+        "tool_name": "Selected tool name",
+        "what_it_helps": "What it specifically helps with for this action (1 sentence)",
+        "why_this_tool": "Why this tool is best for this action (1 sentence)"
+    } or null
+}
+
+Only recommend if it genuinely adds value."""
+
+_STACK_ENRICHMENT_SYSTEM_PROMPT = """You are an automation workflow expert. A semantic search engine selected each stack of tools you are given from a live database to match a user's business problem. For EVERY stack, explain HOW its tools work together as a workflow.
+
+You are given the USER QUERY, the PRIMARY BOTTLENECK, and one block per stack:
+a "STACK <id> (allowed tool names: ...)" header followed by one line per tool as
+name<TAB>description<TAB>key features<TAB>integrations.
+
+STRICT RULE: Within a stack you MUST ONLY reference that stack's allowed tool names.
+Do NOT mention, suggest, or invent any other tools.
+
+OUTPUT FORMAT (JSON only, no markdown fences) — one entry per stack, same stack_id:
+{
+  "stacks": [
+    {
+      "stack_id": 1,
+      "stack_name": "Short descriptive name showing the flow (e.g., Tool A → Tool B)",
+      "workflow_summary": "2 sentences: what this stack does and why it solves the user's problem",
+      "automation_logic": "Step-by-step: how data or tasks flow between the tools (2-3 sentences)",
+      "tool_roles": [
+        {
+          "tool_name": "exact allowed name",
+          "role": "What this specific tool does in this workflow (1 sentence)",
+          "hands_off_to": "What output it passes to the next tool, or 'delivers final output' if last"
+        }
+      ],
+      "setup_order": [
+        {
+          "position": 1,
+          "tool_name": "exact allowed name",
+          "why": "Why set this up first / at this step (1 sentence)"
+        }
+      ]
+    }
+  ]
+}"""
+
+_ROADMAP_SYSTEM_PROMPT = """You are an execution strategist creating a realistic timeline.
+
+Your task: For the user query and action plans you are given, create a strict 7-Day Sprint execution roadmap AND generate a motivational quote.
+
+CRITICAL RULES FOR ROADMAP:
+1. Break into 2-4 phases (not more than 4)
+2. Each phase = specific day range (e.g., "Days 1-3", "Days 4-7")
+3. Each phase has 2-4 concrete tasks
+4. Total timeline must be exactly 7 days (a 7-Day Sprint)
+5. Order phases logically (setup → execute → optimize)
+
+CRITICAL RULES FOR QUOTE:
+1. Generate a UNIQUE motivational quote based on their specific challenge
+2. Should be encouraging but realistic
+3. 1-2 sentences maximum
+4. Reference their specific situation (not generic)
+
+OUTPUT FORMAT (JSON):
+{
+    "total_phases": 3,
+    "estimated_days": 7,
+    "execution_roadmap": [
+        {
+            "phase": "Days 1-3: The Fix",
+            "days": 3,
+            "title": "Research & Planning",
+            "tasks": [
+                "Task 1 description",
+                "Task 2 description"
+            ]
+        }
+    ],
+    "motivational_quote": "You're not behind - you're just early in the sequence. Focus on the bottleneck, and everything else becomes noise."
+}
+
+Be practical and encouraging."""
+
+
+def _decode_json_body(
+    body: str, finish_reason: Optional[str], model: Optional[Type[BaseModel]] = None
+) -> Any:
+    """
+    Decode a completed JSON body, failing fast on a response cut off mid-object.
+
+    A body that hit max_tokens, or does not end in a closing bracket, cannot be
+    valid JSON, so it is rejected without paying for a doomed decode attempt.
+    With a model, the body is parsed and validated against it in one pass
+    (raising pydantic.ValidationError, a ValueError) and returned as a dict.
+    """
+    body = body.rstrip()
+    if finish_reason == "length" or body[-1:] not in ("}", "]"):
+        raise ValueError(
+            f"Incomplete JSON from Grok (finish_reason={finish_reason}, {len(body)} chars)"
+        )
+    if model is not None:
+        return model.model_validate_json(body).model_dump()
+    return orjson.loads(body)
+
+
+def _json_content(response) -> Any:
+    """Decode the JSON body of a JSON-mode chat completion."""
+    choice = response.choices[0]
+    return _decode_json_body(choice.message.content or "", choice.finish_reason)
+
+
+class _StreamItemScanner:
+    """
+    Pick complete array items out of a streamed {"key": [{...}, ...]} JSON body.
+
+    Tracks string/escape state and container depth character by character, so each
+    item (an action plan, a roadmap phase) can be handed on as soon as its closing
+    brace arrives instead of after the whole response has been generated.
+    """
+
+    def __init__(self):
+        self._containers: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item_chars: Optional[List[str]] = None
+
+    def feed(self, text: str) -> List[dict]:
+        """Consume the next chunk of the body; return any items it completed."""
+        items = []
+        for ch in text:
+            if self._item_chars is not None:
+                self._item_chars.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                # An item is an object directly inside an array of the top-level object
+                if ch == "{" and self._containers == ["{", "["]:
+                    self._item_chars = [ch]
+                self._containers.append(ch)
+            elif ch in "}]":
+                if self._containers:
+                    self._containers.pop()
+                if ch == "}" and self._item_chars is not None and self._containers == ["{", "["]:
+                    try:
+                        items.append(orjson.loads("".join(self._item_chars)))
+                    except orjson.JSONDecodeError as e:
+                        # The full body is still decoded and validated at the end
+                        logger.debug("Skipping undecodable streamed item: %s", e)
+                    self._item_chars = None
+        return items
 
 
 class AgenticAnalyzer:
     """
-    Agentic business analyzer with 4 specialized agents + automation stack composer.
+    Agentic business analyzer with 3 specialized agents + automation stack composer.
     Requires XAI_API_KEY in environment — no mock fallbacks.
     """
 
@@ -58,23 +441,89 @@ class AgenticAnalyzer:
         self.reasoning_model = "grok-4-1-fast-reasoning"
         self.fast_model = "grok-4-1-fast-non-reasoning"
 
-        api_key = os.getenv("XAI_API_KEY")
-        if not api_key:
-            raise RuntimeError(
-                "XAI_API_KEY is not set — add it to .env.local before running analysis"
-            )
-
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url="https://api.x.ai/v1",
-            timeout=120.0,
-        )
-        logger.info("xAI Grok client initialized for agentic analysis")
+        self.client = get_client()
 
     async def _llm(self, **kwargs):
-        """Run a blocking OpenAI chat completion in a thread so the event loop stays free."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: self.client.chat.completions.create(**kwargs))
+        """Await a chat completion, holding one of the process-wide Grok slots."""
+        async with get_grok_slots():
+            return await self._create(**kwargs)
+
+    async def _create(self, **kwargs):
+        """
+        Issue a chat completion on the shared async connection pool.
+
+        A strict json_schema response_format the API rejects with a 400 is retried
+        once in JSON mode; if that succeeds the schema is skipped from then on.
+        Callers must hold a get_grok_slots() slot.
+        """
+        response_format = kwargs.get("response_format") or {}
+        if response_format.get("type") != "json_schema":
+            return await self._request(**kwargs)
+
+        schema_name = response_format["json_schema"]["name"]
+        if schema_name in _REJECTED_SCHEMAS:
+            return await self._request(**{**kwargs, "response_format": _JSON_OBJECT})
+        try:
+            return await self._request(**kwargs)
+        except REQUEST_REJECTED as e:
+            logger.warning("Grok rejected the %s schema, retrying in JSON mode: %s", schema_name, e)
+            response = await self._request(**{**kwargs, "response_format": _JSON_OBJECT})
+            _REJECTED_SCHEMAS.add(schema_name)
+            return response
+
+    async def _request(self, **kwargs):
+        """
+        Send one chat completion request.
+
+        Connection errors, timeouts, 429s and 5xx are retried up to _LLM_ATTEMPTS
+        times; only the request is retried, never the caller's parsing.
+        """
+        for attempt in range(1, _LLM_ATTEMPTS + 1):
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except TRANSIENT_ERRORS as e:
+                if attempt == _LLM_ATTEMPTS:
+                    raise
+                backoff = min(_LLM_BACKOFF_MAX, _LLM_BACKOFF_INITIAL * 2 ** (attempt - 1))
+                delay = backoff + random.uniform(0, backoff)
+                logger.warning(
+                    "Grok call failed (%s), retrying in %.1fs (attempt %d/%d)",
+                    type(e).__name__, delay, attempt + 1, _LLM_ATTEMPTS,
+                )
+                await asyncio.sleep(delay)
+
+    async def _stream_json(
+        self,
+        on_item: Optional[Callable[[dict], Awaitable[None]]] = None,
+        model: Optional[Type[BaseModel]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Stream a JSON completion and return the parsed body.
+
+        Each object of the body's top-level array is awaited through on_item the
+        moment it is complete, while the rest of the response is still generating.
+        If model is given, the full body is validated against it.
+        """
+        scanner = _StreamItemScanner()
+        parts = []
+        finish_reason = None
+        # A stream occupies its slot until the last chunk, not just until headers
+        async with get_grok_slots():
+            stream = await self._create(stream=True, **kwargs)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                delta = choice.delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                for item in scanner.feed(delta):
+                    if on_item:
+                        await on_item(item)
+        return _decode_json_body("".join(parts), finish_reason, model)
 
     # =========================================================================
     # SEMANTIC TOOL SEARCH (used by Stage 3)
@@ -86,13 +535,20 @@ class AgenticAnalyzer:
         """Semantic search for relevant AI tools from the database."""
         try:
             search_query = f"{user_query} {action_description}"
-            tools = recommend_tools(search_query, top_k=top_k, db_session=self.db)
+            # Embedding + catalog load are blocking; keep them off the event loop
+            tools = await asyncio.to_thread(
+                recommend_tools,
+                search_query,
+                top_k=top_k,
+                db_session=self.db,
+                description_chars=_TOOLKIT_DESCRIPTION_CHARS,
+            )
             logger.info(
-                f"Found {len(tools)} tools via semantic search for: {action_description[:50]}..."
+                "Found %d tools via semantic search for: %.50s...", len(tools), action_description
             )
             return tools
         except Exception as e:
-            logger.error(f"Semantic search failed: {e}")
+            logger.error("Semantic search failed: %s", e)
             return []
 
     # =========================================================================
@@ -118,217 +574,154 @@ class AgenticAnalyzer:
                 except Exception:
                     pass
 
-        logger.info(f"Starting agentic analysis for user {user_id}")
-        start_time = datetime.now()
+        logger.info("Starting agentic analysis for user %s", user_id)
+        start_time = time.perf_counter()
+
+        # Toolkit matching for each action plan starts while Stage 3 is still streaming
+        toolkit_tasks: List[asyncio.Task] = []
+
+        async def _start_toolkit(plan: dict) -> None:
+            toolkit_tasks.append(asyncio.create_task(self._attach_toolkit(plan, user_query)))
+
+        # Roadmap phases are reported to the client as each one finishes streaming
+        roadmap_phases: List[dict] = []
+
+        async def _phase_ready(phase: dict) -> None:
+            roadmap_phases.append(phase)
+            await _emit(
+                min(90, 70 + 5 * len(roadmap_phases)),
+                f"Roadmap: {phase.get('phase', f'phase {len(roadmap_phases)}')} planned",
+            )
 
         try:
             await _emit(5, "Starting analysis...")
 
-            logger.info("Stage 1: Identifying primary bottleneck...")
+            logger.info("Stage 1: Diagnosing primary bottleneck and secondary constraints...")
             await _emit(10, "Identifying your primary bottleneck...")
-            primary_result = await self._stage1_primary_bottleneck(user_query)
-            await _emit(25, f"Found: {primary_result.get('primary_bottleneck', {}).get('title', 'bottleneck identified')}")
-
-            logger.info("Stage 2: Finding secondary constraints...")
-            await _emit(30, "Mapping secondary constraints...")
-            secondary_result = await self._stage2_secondary_constraints(
-                user_query, primary_result
-            )
-            await _emit(45, "Constraints mapped")
+            primary_result, secondary_result = await self._stage1_diagnosis(user_query)
+            await _emit(45, f"Found: {primary_result.get('primary_bottleneck', {}).get('title', 'bottleneck identified')}")
 
             logger.info("Stage 3: Generating ranked action plans...")
             await _emit(50, "Building ranked action plans...")
             action_plans_result = await self._stage3_action_plans(
-                user_query, primary_result, secondary_result
+                user_query, primary_result, secondary_result, on_plan=_start_toolkit
             )
             await _emit(65, "Action plans ready")
 
-            # Stages 3B and 4 are independent — run in parallel to cut latency
-            logger.info("Stages 3B + 4: running automation stacks and roadmap in parallel...")
-            await _emit(70, "Selecting tool stacks and generating roadmap...")
-            automation_stack_result, roadmap_result = await asyncio.gather(
+            # Toolkit matching, Stage 3B and Stage 4 only need the plan text — fan out together
+            logger.info("Stages 3 toolkits + 3B + 4: running in parallel...")
+            await _emit(70, "Selecting tools, stacks and generating roadmap...")
+            _, automation_stack_result, roadmap_result = await asyncio.gather(
+                self._attach_toolkits(action_plans_result, user_query, toolkit_tasks),
                 self._stage3_automation_stacks(
                     user_query=user_query,
                     action_plans_result=action_plans_result,
                     primary_result=primary_result,
                     secondary_result=secondary_result,
                 ),
-                self._stage4_roadmap_and_motivation(user_query, action_plans_result),
+                self._stage4_roadmap_and_motivation(
+                    user_query, action_plans_result, on_phase=_phase_ready
+                ),
             )
             await _emit(92, "Roadmap complete")
 
-            duration_seconds = (datetime.now() - start_time).total_seconds()
+            duration_seconds = time.perf_counter() - start_time
+            insights_count, recommendations_count = self._summarize(action_plans_result)
 
             confidence_score = self._calculate_confidence_score(
                 primary_result=primary_result,
                 action_plans_result=action_plans_result,
                 roadmap_result=roadmap_result,
+                recommendations_count=recommendations_count,
                 automation_stack_result=automation_stack_result,
             )
 
-            await _emit(95, "Saving your analysis...")
-            analysis_id = await self._save_to_database(
-                user_id=user_id,
+            fields = self._analysis_fields(
                 user_query=user_query,
                 primary_result=primary_result,
                 secondary_result=secondary_result,
                 action_plans_result=action_plans_result,
                 automation_stack_result=automation_stack_result,
                 roadmap_result=roadmap_result,
+            )
+
+            await _emit(95, "Saving your analysis...")
+            analysis_id = await self._save_to_database(
+                user_id=user_id,
+                fields=fields,
                 duration=duration_seconds,
                 confidence_score=confidence_score,
+                insights_count=insights_count,
+                recommendations_count=recommendations_count,
             )
 
-            response = self._format_for_frontend(
-                analysis_id=analysis_id,
-                user_query=user_query,
-                primary_result=primary_result,
-                secondary_result=secondary_result,
-                action_plans_result=action_plans_result,
-                automation_stack_result=automation_stack_result,
-                roadmap_result=roadmap_result,
-            )
+            response = self._format_for_frontend(analysis_id=analysis_id, fields=fields)
 
             await _emit(100, "Analysis complete!")
-            logger.info(f"Analysis complete in {duration_seconds:.1f}s")
+            logger.info("Analysis complete in %.1fs", duration_seconds)
             return response
 
         except Exception as e:
-            logger.error(f"Analysis failed: {e}", exc_info=True)
+            for task in toolkit_tasks:
+                task.cancel()
+            logger.error("Analysis failed: %s", e, exc_info=True)
             raise
 
     # =========================================================================
-    # STAGE 1: PRIMARY BOTTLENECK AGENT
+    # STAGE 1: DIAGNOSIS AGENT (primary bottleneck + secondary constraints)
     # =========================================================================
 
-    async def _stage1_primary_bottleneck(self, user_query: str) -> Dict[str, Any]:
+    async def _stage1_diagnosis(self, user_query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
-        Identify THE single most critical bottleneck.
+        Identify THE single most critical bottleneck and the 2-4 secondary
+        constraints around it in one structured call.
 
         Returns:
-            {
-                "primary_bottleneck": {"title", "description", "consequence"},
-                "strategic_priority": str,
-                "what_to_stop": str
-            }
-        """
-        prompt = f"""You are an elite business consultant analyzing a user's business challenge.
-
-USER QUERY: "{user_query}"
-
-Your task: Identify THE SINGLE most critical bottleneck blocking their success.
-
-CRITICAL RULES:
-1. Identify ONLY ONE primary bottleneck (not 3-5, just ONE)
-2. The bottleneck must be the ROOT CAUSE, not a symptom
-3. Describe what's ACTUALLY broken in simple terms
-4. Explain the consequence if they ignore this (be specific and impactful)
-5. Identify the strategic priority (what they should focus on)
-6. Identify ONE critical action they must STOP doing (wastes time/resources)
-
-OUTPUT FORMAT (JSON):
-{{
-    "primary_bottleneck": {{
-        "title": "Clear, concise title (5-10 words)",
-        "description": "What's actually broken (2-3 sentences, be direct)",
-        "consequence": "Specific consequence if ignored (1-2 sentences, make it real)"
-    }},
-    "strategic_priority": "The ONE thing they should focus on (1 sentence)",
-    "what_to_stop": "The ONE action they must stop immediately (1 sentence, be direct)"
-}}
-
-Think like a consultant who charges $500/hour. Be brutally honest, specific, and actionable."""
-
-        try:
-            response = await self._llm(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=800,
+            (
+                {
+                    "primary_bottleneck": {"title", "description", "consequence"},
+                    "strategic_priority": str,
+                    "what_to_stop": str
+                },
+                {"secondary_constraints": [{"id", "title", "description"}, ...]}
             )
-            result_text = response.choices[0].message.content.strip()
-
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
-            logger.info(f"Primary bottleneck: {result['primary_bottleneck']['title']}")
-            return result
-
-        except Exception as e:
-            logger.error(f"Stage 1 failed: {e}")
-            raise
-
-    # =========================================================================
-    # STAGE 2: SECONDARY CONSTRAINTS AGENT
-    # =========================================================================
-
-    async def _stage2_secondary_constraints(
-        self, user_query: str, primary_result: Dict
-    ) -> Dict[str, Any]:
-        """
-        Identify 2-4 secondary constraints.
-
-        Returns:
-            {"secondary_constraints": [{"id", "title", "description"}, ...]}
         """
-        primary_title = primary_result["primary_bottleneck"]["title"]
-
-        prompt = f"""You are an elite business consultant analyzing secondary issues.
-
-USER QUERY: "{user_query}"
-PRIMARY BOTTLENECK: "{primary_title}"
-
-Your task: Identify 2-4 SECONDARY constraints that compound the primary issue.
-
-CRITICAL RULES:
-1. These are NOT as critical as the primary bottleneck
-2. They should be related but distinct issues
-3. Keep descriptions brief and actionable
-4. Order by impact (most impactful first)
-5. If the user's situation is simple, return only 2 constraints
-6. Maximum 4 constraints
-
-OUTPUT FORMAT (JSON):
-{{
-    "secondary_constraints": [
-        {{
-            "id": 1,
-            "title": "Brief title (5-8 words)",
-            "description": "What's the issue (1-2 sentences)"
-        }},
-        {{
-            "id": 2,
-            "title": "Brief title (5-8 words)",
-            "description": "What's the issue (1-2 sentences)"
-        }}
-    ]
-}}
-
-Be specific and practical."""
+        user_message = f'USER QUERY: "{user_query}"'
+        # Shared across users on purpose: the query is the prompt's only input, so
+        # any user submitting the same goal would get an equivalent diagnosis.
+        cache_key = stage_key("diagnosis", user_query)
 
         try:
-            response = await self._llm(
-                model=self.fast_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.6,
-                max_tokens=600,
+            result = stage_cache.get(cache_key)
+            cached = result is not None
+            if cached:
+                logger.info("Stage 1 served from cache")
+            else:
+                response = await self._llm(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": _DIAGNOSIS_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_message},
+                    ],
+                    temperature=0.7,
+                    max_tokens=1200,
+                    response_format=_JSON_OBJECT,
+                )
+                result = _json_content(response)
+
+            secondary_result = {"secondary_constraints": result.pop("secondary_constraints")}
+            logger.info(
+                "Primary bottleneck: %s (+%d secondary constraints)",
+                result["primary_bottleneck"]["title"],
+                len(secondary_result["secondary_constraints"]),
             )
-            result_text = response.choices[0].message.content.strip()
-
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
-            logger.info(f"Identified {len(result['secondary_constraints'])} secondary constraints")
-            return result
+            # Only cache a response that has the shape later stages index into
+            if not cached:
+                stage_cache.set(cache_key, {**result, **secondary_result})
+            return result, secondary_result
 
         except Exception as e:
-            logger.error(f"Stage 2 failed: {e}")
+            logger.error("Stage 1 failed: %s", e)
             raise
 
     async def _attach_toolkit(self, plan: dict, user_query: str) -> dict:
@@ -344,50 +737,36 @@ Be specific and practical."""
             top_k=3,
         )
 
-        if not tools:
+        # Nothing in the catalog is close to this action: a Grok call would only
+        # be asked to reject (or worse, rationalize) unrelated tools.
+        if not tools or max(t["similarity_score"] for t in tools) < _TOOLKIT_MIN_SIMILARITY:
             plan["toolkit"] = None
             plan.pop("needs_ai_tool", None)
             return plan
 
-        tool_names = [f"{t['tool_name']}: {t['description'][:100]}" for t in tools]
-        prompt_tool_selection = f"""You are selecting the best AI tool for a specific action.
-
-ACTION: {plan['title']}
-WHAT TO DO: {plan.get('what_to_do', '')}
-
-AVAILABLE TOOLS (from semantic search):
-{chr(10).join([f"{i+1}. {t}" for i, t in enumerate(tool_names)])}
-
-Your task: Pick the BEST tool for this action, or return null if none are good fits.
-
-OUTPUT FORMAT (JSON):
-{{
-    "selected_tool_index": 0 or null,
-    "toolkit": {{
-        "tool_name": "Selected tool name",
-        "what_it_helps": "What it specifically helps with for this action (1 sentence)",
-        "why_this_tool": "Why this tool is best for this action (1 sentence)"
-    }} or null
-}}
-
-Only recommend if it genuinely adds value."""
+        # One "index|name|summary" line per candidate keeps the prefill small
+        tool_lines = [f"{i}|{t['tool_name']}|{t['summary']}" for i, t in enumerate(tools)]
+        user_message = (
+            f"ACTION: {plan['title']}\n"
+            f"WHAT TO DO: {plan.get('what_to_do', '')}\n\n"
+            f"AVAILABLE TOOLS:\n" + "\n".join(tool_lines)
+        )
 
         try:
             tool_response = await self._llm(
                 model=self.fast_model,
-                messages=[{"role": "user", "content": prompt_tool_selection}],
+                messages=[
+                    {"role": "system", "content": _TOOLKIT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message},
+                ],
                 temperature=0.6,
                 max_tokens=300,
+                response_format=_TOOLKIT_FORMAT,
             )
-            tool_text = tool_response.choices[0].message.content.strip()
-            if "```json" in tool_text:
-                tool_text = tool_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in tool_text:
-                tool_text = tool_text.split("```")[1].split("```")[0].strip()
-            tool_selection = json.loads(tool_text)
+            tool_selection = _json_content(tool_response)
             plan["toolkit"] = tool_selection.get("toolkit")
         except Exception as e:
-            logger.warning(f"Toolkit selection failed for plan '{plan['title']}': {e}")
+            logger.warning("Toolkit selection failed for plan '%s': %s", plan["title"], e)
             plan["toolkit"] = None
 
         plan.pop("needs_ai_tool", None)
@@ -402,211 +781,216 @@ Only recommend if it genuinely adds value."""
         user_query: str,
         primary_result: Dict,
         secondary_result: Dict,
+        on_plan: Optional[Callable[[dict], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
         """
-        Generate ranked action plans with AI tools matched via semantic search.
+        Generate ranked action plans and flag which ones need an AI tool.
 
-        Workflow:
-        1. LLM generates action plans and flags which need an AI tool
-        2. Semantic search retrieves matching tool candidates from DB
-        3. LLM selects the best match and attaches it as a toolkit
+        The response is streamed and each plan is passed to on_plan as soon as it
+        is complete, so toolkit matching can start before the last plan is written.
+        Toolkits are attached by _attach_toolkits, alongside Stages 3B and 4.
 
         Returns:
             {
                 "action_plans": [
                     {
                         "id", "title", "what_to_do", "why_it_matters",
-                        "effort_level", "toolkit": {"tool_name", "what_it_helps", "why_this_tool"} | null
+                        "effort_level", "needs_ai_tool"
                     }
                 ],
                 "exclusions_note": str
             }
         """
         primary_title = primary_result["primary_bottleneck"]["title"]
-        constraints = json.dumps([c["title"] for c in secondary_result["secondary_constraints"]])
-
-        prompt_actions = f"""You are an elite business strategist creating an action plan.
-
-USER QUERY: "{user_query}"
-PRIMARY BOTTLENECK: "{primary_title}"
-SECONDARY CONSTRAINTS: {constraints}
-
-Your task: Create 3-5 RANKED action plans that solve the primary bottleneck.
+        constraints = orjson.dumps(
+            [c["title"] for c in secondary_result["secondary_constraints"]]
+        ).decode()
+
+        user_message = (
+            f'USER QUERY: "{user_query}"\n'
+            f'PRIMARY BOTTLENECK: "{primary_title}"\n'
+            f"SECONDARY CONSTRAINTS: {constraints}"
+        )
 
-CRITICAL RULES:
-1. Order by LEVERAGE (highest impact first, not chronological)
-2. Each action must directly address the primary bottleneck
-3. "what_to_do" = a LIST of clear, executable steps (complete, meaningful sentences)
-4. "why_it_matters" = a LIST of business impact/reasoning points (complete, meaningful sentences)
-5. "effort_level" = Low, Medium, or High
-6. "needs_ai_tool" = true if AI automation could significantly help, false otherwise
-7. Maximum 5 action plans
-8. Include an "exclusions_note" explaining what you intentionally excluded
+        cache_key = stage_key("action_plans", user_query, primary_title, constraints)
 
-OUTPUT FORMAT (JSON):
-{{
-    "action_plans": [
-        {{
-            "id": 1,
-            "title": "Action title (5-10 words)",
-            "what_to_do": ["Step 1", "Step 2"],
-            "why_it_matters": ["Impact 1"],
-            "effort_level": "Low",
-            "needs_ai_tool": false
-        }}
-    ],
-    "exclusions_note": "What strategies you excluded and why (2-3 sentences)"
-}}
+        try:
+            result = stage_cache.get(cache_key)
+            cached = result is not None
+            if cached:
+                logger.info("Stage 3 served from cache")
+            else:
+                result = await self._stream_json(
+                    on_plan,
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": _ACTION_PLANS_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_message},
+                    ],
+                    temperature=0.7,
+                    max_tokens=1500,
+                    response_format=_JSON_OBJECT,
+                )
+
+            logger.info("Generated %d action plans", len(result["action_plans"]))
+            if not cached:
+                stage_cache.set(cache_key, result)
+            return result
 
-Be practical and specific."""
+        except Exception as e:
+            logger.error("Stage 3 failed: %s", e)
+            raise
 
-        try:
-            response = await self._llm(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt_actions}],
-                temperature=0.7,
-                max_tokens=1500,
-            )
-            result_text = response.choices[0].message.content.strip()
+    async def _attach_toolkits(
+        self,
+        action_plans_result: Dict,
+        user_query: str,
+        pending: Optional[List[asyncio.Task]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Match toolkits for every action plan in parallel.
 
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
+        Workflow:
+        1. Semantic search retrieves matching tool candidates from DB
+        2. LLM selects the best match and attaches it as a toolkit
 
-            result = json.loads(result_text)
-            action_plans = result["action_plans"]
+        pending holds tasks already started on plans as Stage 3 streamed them. They
+        are used when they cover every plan; otherwise (cache hit, or a plan that
+        could not be picked out of the stream) matching runs on the final plans.
 
-            # Attach toolkits to all plans in parallel
+        Each plan gains "toolkit": {"tool_name", "what_it_helps", "why_this_tool"} | null.
+        """
+        plans = action_plans_result["action_plans"]
+        if pending and len(pending) == len(plans):
+            action_plans_with_toolkits = await asyncio.gather(*pending)
+        else:
+            for task in pending or []:
+                task.cancel()
             action_plans_with_toolkits = await asyncio.gather(*[
-                self._attach_toolkit(plan, user_query) for plan in action_plans
+                self._attach_toolkit(plan, user_query) for plan in plans
             ])
-            result["action_plans"] = list(action_plans_with_toolkits)
-
-            logger.info(f"Generated {len(result['action_plans'])} action plans with semantic tool matching")
-            return result
-
-        except Exception as e:
-            logger.error(f"Stage 3 failed: {e}")
-            raise
+        action_plans_result["action_plans"] = list(action_plans_with_toolkits)
+        logger.info("Matched toolkits for %d action plans", len(action_plans_with_toolkits))
+        return action_plans_result
 
     # =========================================================================
     # STAGE 3B: AUTOMATION STACK AGENT
     # =========================================================================
 
-    async def _enrich_single_stack(
-        self, stack: dict, user_query: str, primary_bottleneck: str
-    ) -> dict:
-        """LLM-enrich a single stack. Returns the stack (modified in place)."""
-        tools = stack.get("tools", [])
-        if not tools:
-            return stack
-
-        allowed_tool_names = [t.get("tool_name", "") for t in tools if t.get("tool_name")]
-
+    @staticmethod
+    def _stack_tool_context(stack: dict) -> str:
+        """One tab-separated line per tool keeps the prompt to ~40% of the labelled layout."""
         tool_context_parts = []
-        for tool in tools:
+        for tool in stack.get("tools", []):
             name = tool.get("tool_name", "")
-            desc = (tool.get("description") or "")[:200]
+            desc = " ".join((tool.get("description") or "")[:120].split())
             features_raw = tool.get("key_features") or ""
             integrations_raw = tool.get("compatibility_integration") or ""
-            features = features_raw[:200].replace('["', "").replace('"]', "").replace('",', ",")
-            integrations = integrations_raw[:200].replace('["', "").replace('"]', "").replace('",', ",")
-            tool_context_parts.append(
-                f"- {name}: {desc}\n"
-                f"  Key Features: {features}\n"
-                f"  Integrations: {integrations}"
-            )
+            features = features_raw[:150].replace('["', "").replace('"]', "").replace('",', ",")
+            integrations = integrations_raw[:150].replace('["', "").replace('"]', "").replace('",', ",")
+            tool_context_parts.append(f"{name}\t{desc}\t{features}\t{integrations}")
+        return "\n".join(tool_context_parts)
+
+    @staticmethod
+    def _apply_stack_enrichment(stack: dict, llm_data: dict) -> None:
+        """Merge one stack's LLM output into it, keeping only tools the stack really has."""
+        allowed_tool_set = {t.get("tool_name") for t in stack.get("tools", []) if t.get("tool_name")}
+
+        validated_tool_roles = [
+            tr for tr in llm_data.get("tool_roles", [])
+            if tr.get("tool_name") in allowed_tool_set
+        ]
+        validated_setup_order = [
+            so for so in llm_data.get("setup_order", [])
+            if so.get("tool_name") in allowed_tool_set
+        ]
+
+        stack["stack_name"] = llm_data.get("stack_name", stack.get("stack_name", ""))
+        stack["workflow_summary"] = llm_data.get("workflow_summary", stack.get("summary", ""))
+        stack["automation_logic"] = llm_data.get("automation_logic", stack.get("automation_logic", ""))
+        if validated_tool_roles:
+            stack["tool_roles"] = validated_tool_roles
+        if validated_setup_order:
+            stack["setup_order"] = validated_setup_order
 
-        tool_context = "\n".join(tool_context_parts)
-        allowed_names_str = ", ".join(f'"{n}"' for n in allowed_tool_names)
+    async def _enrich_stacks_with_llm(
+        self,
+        stacks: List[Dict],
+        user_query: str,
+        primary_bottleneck: str,
+    ) -> List[Dict]:
+        """
+        LLM agent pass: reason about HOW selected DB tools work together.
 
-        prompt = f"""You are an automation workflow expert. A semantic search engine selected these tools from a live database to match a user's business problem. Explain HOW they work together as a workflow.
+        Stacks go out _ENRICHMENT_BATCH_SIZE per request, so the instructions and
+        user context are shared within a batch while the output budget stays
+        bounded; batches run concurrently. Stacks are modified in place; any the
+        model skips (or a whole batch, on failure) keep their algorithmic copy.
+        """
+        stacks_with_tools = [stack for stack in stacks if stack.get("tools")]
+        if not stacks_with_tools:
+            return stacks
 
-STRICT RULE: You MUST ONLY reference these exact tool names from the database: {allowed_names_str}
-Do NOT mention, suggest, or invent any other tools.
+        batches = [
+            stacks_with_tools[i:i + _ENRICHMENT_BATCH_SIZE]
+            for i in range(0, len(stacks_with_tools), _ENRICHMENT_BATCH_SIZE)
+        ]
+        enriched_by_id: Dict[Any, dict] = {}
+        for batch_result in await asyncio.gather(*(
+            self._enrich_stack_batch(batch, user_query, primary_bottleneck) for batch in batches
+        )):
+            enriched_by_id.update(batch_result)
+
+        for stack in stacks_with_tools:
+            llm_data = enriched_by_id.get(stack["stack_id"])
+            if llm_data:
+                self._apply_stack_enrichment(stack, llm_data)
+                logger.info("LLM enriched stack: %s", stack.get("stack_name", "?"))
+
+        return stacks
+
+    async def _enrich_stack_batch(
+        self,
+        batch: List[Dict],
+        user_query: str,
+        primary_bottleneck: str,
+    ) -> Dict[Any, dict]:
+        """One enrichment request for a batch of stacks; returns LLM output by stack_id."""
+        stack_blocks = []
+        for stack in batch:
+            allowed_names_str = ", ".join(
+                f'"{t["tool_name"]}"' for t in stack["tools"] if t.get("tool_name")
+            )
+            stack_blocks.append(
+                f"STACK {stack['stack_id']} (allowed tool names: {allowed_names_str})\n"
+                f"{self._stack_tool_context(stack)}"
+            )
 
-USER QUERY: "{user_query}"
-PRIMARY BOTTLENECK: "{primary_bottleneck}"
-
-TOOLS SELECTED FROM DATABASE:
-{tool_context}
-
-Explain how these {len(tools)} tool(s) form an automation workflow for this user.
-
-OUTPUT FORMAT (JSON only, no markdown fences):
-{{
-  "stack_name": "Short descriptive name showing the flow (e.g., Tool A → Tool B)",
-  "workflow_summary": "2 sentences: what this stack does and why it solves the user's problem",
-  "automation_logic": "Step-by-step: how data or tasks flow between the tools (2-3 sentences)",
-  "tool_roles": [
-    {{
-      "tool_name": "exact name from the list above",
-      "role": "What this specific tool does in this workflow (1 sentence)",
-      "hands_off_to": "What output it passes to the next tool, or 'delivers final output' if last"
-    }}
-  ],
-  "setup_order": [
-    {{
-      "position": 1,
-      "tool_name": "exact name from the list above",
-      "why": "Why set this up first / at this step (1 sentence)"
-    }}
-  ]
-}}"""
+        user_message = (
+            f'USER QUERY: "{user_query}"\n'
+            f'PRIMARY BOTTLENECK: "{primary_bottleneck}"\n\n'
+            + "\n\n".join(stack_blocks)
+        )
 
         try:
             response = await self._llm(
                 model=self.fast_model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": _STACK_ENRICHMENT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message},
+                ],
                 temperature=0.4,
-                max_tokens=700,
+                max_tokens=_ENRICHMENT_TOKENS_PER_STACK * len(batch),
+                response_format=_STACK_ENRICHMENT_FORMAT,
             )
-            result_text = response.choices[0].message.content.strip()
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            llm_data = json.loads(result_text)
-
-            validated_tool_roles = [
-                tr for tr in llm_data.get("tool_roles", [])
-                if tr.get("tool_name") in allowed_tool_names
-            ]
-            validated_setup_order = [
-                so for so in llm_data.get("setup_order", [])
-                if so.get("tool_name") in allowed_tool_names
-            ]
-
-            stack["stack_name"] = llm_data.get("stack_name", stack.get("stack_name", ""))
-            stack["workflow_summary"] = llm_data.get("workflow_summary", stack.get("summary", ""))
-            stack["automation_logic"] = llm_data.get("automation_logic", stack.get("automation_logic", ""))
-            if validated_tool_roles:
-                stack["tool_roles"] = validated_tool_roles
-            if validated_setup_order:
-                stack["setup_order"] = validated_setup_order
-
-            logger.info(f"LLM enriched stack: {stack.get('stack_name', '?')}")
+            return {
+                item.get("stack_id"): item for item in _json_content(response).get("stacks", [])
+            }
         except Exception as e:
-            logger.warning(f"LLM enrichment failed for stack, keeping base values: {e}")
-
-        return stack
-
-    async def _enrich_stacks_with_llm(
-        self,
-        stacks: List[Dict],
-        user_query: str,
-        primary_bottleneck: str,
-    ) -> List[Dict]:
-        """LLM agent pass: reason about HOW selected DB tools work together. Runs all stacks in parallel."""
-        if not stacks:
-            return stacks
-        results = await asyncio.gather(*[
-            self._enrich_single_stack(stack, user_query, primary_bottleneck)
-            for stack in stacks
-        ])
-        return list(results)
+            logger.warning(
+                "LLM enrichment failed for %d stacks, keeping base values: %s", len(batch), e
+            )
+            return {}
 
     async def _stage3_automation_stacks(
         self,
@@ -621,7 +1005,8 @@ OUTPUT FORMAT (JSON only, no markdown fences):
         """
         try:
             action_plans = action_plans_result.get("action_plans", []) or []
-            stacks = recommend_automation_stacks(
+            stacks = await asyncio.to_thread(
+                recommend_automation_stacks,
                 user_query=user_query,
                 action_plans=action_plans,
                 top_k_stacks=3,
@@ -644,11 +1029,11 @@ OUTPUT FORMAT (JSON only, no markdown fences):
                     stack["solves"] = f"Helps reduce: {', '.join(constraint_titles[:3])}."
                 valid_stacks.append(stack)
 
-            logger.info(f"Built {len(valid_stacks)} raw automation stacks (enrichment deferred)")
+            logger.info("Built %d raw automation stacks (enrichment deferred)", len(valid_stacks))
             return {"recommended_tool_stacks": valid_stacks}
 
         except Exception as e:
-            logger.error(f"Stage 3B failed: {e}", exc_info=True)
+            logger.error("Stage 3B failed: %s", e, exc_info=True)
             return {"recommended_tool_stacks": []}
 
     # =========================================================================
@@ -656,11 +1041,17 @@ OUTPUT FORMAT (JSON only, no markdown fences):
     # =========================================================================
 
     async def _stage4_roadmap_and_motivation(
-        self, user_query: str, action_plans_result: Dict
+        self,
+        user_query: str,
+        action_plans_result: Dict,
+        on_phase: Optional[Callable[[dict], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
         """
         Create a 7-day sprint execution roadmap and a motivational quote.
 
+        The response is streamed; on_phase is awaited with each roadmap phase as
+        soon as it is complete (used for per-phase progress events).
+
         Returns:
             {
                 "total_phases": int,
@@ -670,94 +1061,64 @@ OUTPUT FORMAT (JSON only, no markdown fences):
             }
         """
         action_titles = [ap["title"] for ap in action_plans_result["action_plans"]]
-        action_list = json.dumps(action_titles)
-
-        prompt = f"""You are an execution strategist creating a realistic timeline.
-
-USER QUERY: "{user_query}"
-ACTION PLANS: {action_list}
-
-Your task: Create a strict 7-Day Sprint execution roadmap AND generate a motivational quote.
-
-CRITICAL RULES FOR ROADMAP:
-1. Break into 2-4 phases (not more than 4)
-2. Each phase = specific day range (e.g., "Days 1-3", "Days 4-7")
-3. Each phase has 2-4 concrete tasks
-4. Total timeline must be exactly 7 days (a 7-Day Sprint)
-5. Order phases logically (setup → execute → optimize)
-
-CRITICAL RULES FOR QUOTE:
-1. Generate a UNIQUE motivational quote based on their specific challenge
-2. Should be encouraging but realistic
-3. 1-2 sentences maximum
-4. Reference their specific situation (not generic)
-
-OUTPUT FORMAT (JSON):
-{{
-    "total_phases": 3,
-    "estimated_days": 7,
-    "execution_roadmap": [
-        {{
-            "phase": "Days 1-3: The Fix",
-            "days": 3,
-            "title": "Research & Planning",
-            "tasks": [
-                "Task 1 description",
-                "Task 2 description"
-            ]
-        }}
-    ],
-    "motivational_quote": "You're not behind - you're just early in the sequence. Focus on the bottleneck, and everything else becomes noise."
-}}
+        action_list = orjson.dumps(action_titles).decode()
 
-Be practical and encouraging."""
+        user_message = f'USER QUERY: "{user_query}"\nACTION PLANS: {action_list}'
 
         try:
-            response = await self._llm(
+            result = await self._stream_json(
+                on_phase,
+                RoadmapResponse,
                 model=self.fast_model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": _ROADMAP_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message},
+                ],
                 temperature=0.7,   # slightly lower = fewer hallucinations, faster
-                max_tokens=600,    # 800→600: roadmap JSON is typically ~400 tokens
+                # Roadmap JSON is typically ~400 tokens; a truncated body fails the
+                # whole analysis, so keep 2x headroom rather than a tight cap
+                max_tokens=800,
+                response_format=_ROADMAP_FORMAT,
             )
-            result_text = response.choices[0].message.content.strip()
-
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
 
             # Deduplicate tasks within each phase at the source so the frontend
             # doesn't have to deal with LLM repetitions.
-            for phase in result.get("execution_roadmap", []):
+            for phase in result["execution_roadmap"]:
                 seen: set = set()
                 deduped = []
-                for t in phase.get("tasks", []):
-                    key = str(t).lower().strip()[:60]
+                for t in phase["tasks"]:
+                    key = t.lower().strip()[:60]
                     if key not in seen:
                         seen.add(key)
                         deduped.append(t)
                 phase["tasks"] = deduped
 
             logger.info(
-                f"Created {result['total_phases']}-phase roadmap ({result['estimated_days']} days)"
+                "Created %d-phase roadmap (%d days)",
+                result["total_phases"], result["estimated_days"],
             )
             return result
 
         except Exception as e:
-            logger.error(f"Stage 4 failed: {e}")
+            logger.error("Stage 4 failed: %s", e)
             raise
 
     # =========================================================================
     # CONFIDENCE SCORE
     # =========================================================================
 
+    @staticmethod
+    def _summarize(action_plans_result: Dict) -> Tuple[int, int]:
+        """Return (action plan count, plans with a toolkit) — shared by scoring and save."""
+        action_plans = action_plans_result.get("action_plans", [])
+        return len(action_plans), sum(1 for ap in action_plans if ap.get("toolkit"))
+
     def _calculate_confidence_score(
         self,
         primary_result: Dict,
         action_plans_result: Dict,
         roadmap_result: Dict,
+        recommendations_count: int,
         automation_stack_result: Optional[Dict] = None,
     ) -> int:
         """
@@ -784,9 +1145,8 @@ Be practical and encouraging."""
         if 3 <= num_plans <= 4:
             score += 2
 
-        tools_count = len([ap for ap in action_plans if ap.get("toolkit")])
-        if tools_count > 0:
-            score += min(tools_count * 2, 5)
+        if recommendations_count > 0:
+            score += min(recommendations_count * 2, 5)
 
         stack_count = len((automation_stack_result or {}).get("recommended_tool_stacks", []))
         if stack_count > 0:
@@ -801,20 +1161,51 @@ Be practical and encouraging."""
         return min(score, 98)
 
     # =========================================================================
-    # DATABASE SAVE
+    # RESULT FIELDS (shared by save and frontend format)
     # =========================================================================
 
-    async def _save_to_database(
-        self,
-        user_id: int,
+    @staticmethod
+    def _analysis_fields(
         user_query: str,
         primary_result: Dict,
         secondary_result: Dict,
         action_plans_result: Dict,
         automation_stack_result: Dict,
         roadmap_result: Dict,
+    ) -> Dict[str, Any]:
+        """
+        Flatten the stage results into BusinessAnalysis-named fields in one pass.
+
+        The roadmap arrives already validated (RoadmapResponse), so its counts are
+        real ints and need no casting here.
+        """
+        return {
+            "business_goal": user_query,
+            "primary_bottleneck": primary_result["primary_bottleneck"],
+            "secondary_constraints": secondary_result["secondary_constraints"],
+            "what_to_stop": primary_result["what_to_stop"],
+            "strategic_priority": primary_result["strategic_priority"],
+            "action_plans": action_plans_result["action_plans"],
+            "recommended_tool_stacks": automation_stack_result.get("recommended_tool_stacks", []),
+            "total_phases": roadmap_result["total_phases"],
+            "estimated_days": roadmap_result["estimated_days"],
+            "execution_roadmap": roadmap_result["execution_roadmap"],
+            "exclusions_note": action_plans_result["exclusions_note"],
+            "motivational_quote": roadmap_result["motivational_quote"],
+        }
+
+    # =========================================================================
+    # DATABASE SAVE
+    # =========================================================================
+
+    async def _save_to_database(
+        self,
+        user_id: int,
+        fields: Dict[str, Any],
         duration: float,
         confidence_score: int,
+        insights_count: int,
+        recommendations_count: int,
     ) -> int:
         """Persist analysis results to the database."""
         from database.pg_models import BusinessAnalysis
@@ -822,38 +1213,38 @@ Be practical and encouraging."""
         try:
             analysis = BusinessAnalysis(
                 user_id=user_id,
-                business_goal=user_query,
-                primary_bottleneck=json.dumps(primary_result["primary_bottleneck"]),
-                secondary_constraints=json.dumps(secondary_result["secondary_constraints"]),
-                what_to_stop=primary_result["what_to_stop"],
-                strategic_priority=primary_result["strategic_priority"],
-                action_plans=json.dumps(action_plans_result["action_plans"]),
-                recommended_tool_stacks=json.dumps(
-                    automation_stack_result.get("recommended_tool_stacks", [])
-                ),
-                total_phases=roadmap_result["total_phases"],
-                estimated_days=roadmap_result["estimated_days"],
-                execution_roadmap=json.dumps(roadmap_result["execution_roadmap"]),
-                exclusions_note=action_plans_result["exclusions_note"],
-                motivational_quote=roadmap_result["motivational_quote"],
+                **{
+                    name: orjson.dumps(value).decode() if name in _JSON_COLUMNS else value
+                    for name, value in fields.items()
+                },
                 confidence_score=confidence_score,
                 duration=f"{duration:.1f}s",
                 analysis_type="agentic",
-                insights_count=len(action_plans_result["action_plans"]),
-                recommendations_count=len(
-                    [ap for ap in action_plans_result["action_plans"] if ap.get("toolkit")]
-                ),
+                insights_count=insights_count,
+                recommendations_count=recommendations_count,
             )
 
-            self.db.add(analysis)
-            self.db.commit()
-            self.db.refresh(analysis)
+            # psycopg2 is blocking — run the INSERT round trip off the event loop.
+            analysis_id = await asyncio.to_thread(self._persist, analysis)
 
-            logger.info(f"Saved analysis ID: {analysis.id}")
-            return analysis.id
+            logger.info("Saved analysis ID: %s", analysis_id)
+            return analysis_id
 
         except Exception as e:
-            logger.error(f"Failed to save analysis: {e}")
+            logger.error("Failed to save analysis: %s", e)
+            raise
+
+    def _persist(self, analysis) -> int:
+        """Insert a row on the analyzer's session and return its primary key."""
+        try:
+            self.db.add(analysis)
+            # The INSERT ... RETURNING on flush yields the id; read it before commit
+            # expires the instance, so no follow-up SELECT is needed.
+            self.db.flush()
+            analysis_id = analysis.id
+            self.db.commit()
+            return analysis_id
+        except Exception:
             self.db.rollback()
             raise
 
@@ -861,35 +1252,13 @@ Be practical and encouraging."""
     # FORMAT FOR FRONTEND
     # =========================================================================
 
-    def _format_for_frontend(
-        self,
-        analysis_id: int,
-        user_query: str,
-        primary_result: Dict,
-        secondary_result: Dict,
-        action_plans_result: Dict,
-        automation_stack_result: Dict,
-        roadmap_result: Dict,
-    ) -> Dict[str, Any]:
+    def _format_for_frontend(self, analysis_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
         """Format analysis results for the frontend result page."""
         return {
             "success": True,
             "data": {
                 "analysis_id": analysis_id,
-                "business_goal": user_query,
-                "primary_bottleneck": primary_result["primary_bottleneck"],
-                "secondary_constraints": secondary_result["secondary_constraints"],
-                "what_to_stop": primary_result["what_to_stop"],
-                "strategic_priority": primary_result["strategic_priority"],
-                "action_plans": action_plans_result["action_plans"],
-                "recommended_tool_stacks": automation_stack_result.get(
-                    "recommended_tool_stacks", []
-                ),
-                "total_phases": roadmap_result["total_phases"],
-                "estimated_days": roadmap_result["estimated_days"],
-                "execution_roadmap": roadmap_result["execution_roadmap"],
-                "exclusions_note": action_plans_result["exclusions_note"],
-                "motivational_quote": roadmap_result["motivational_quote"],
+                **fields,
                 "created_at": datetime.now().isoformat(),
                 "ai_model": self.model,
             },
@@ -0,0 +1,118 @@
+# decision_engine/grok_client.py
+"""
+Shared transport for xAI Grok calls.
+
+Every AgenticAnalyzer talks to api.x.ai through one AsyncOpenAI client on one
+pooled httpx.AsyncClient, so keep-alive connections are reused across analyses
+instead of each request paying a fresh TCP/TLS handshake. The pool is closed on
+app shutdown.
+"""
+
+import asyncio
+import logging
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+try:
+    from openai import (
+        APIConnectionError,
+        AsyncOpenAI,
+        BadRequestError,
+        InternalServerError,
+        RateLimitError,
+    )
+except ImportError as exc:
+    raise RuntimeError(
+        "openai package not installed — run: uv pip install openai"
+    ) from exc
+
+logger = logging.getLogger(__name__)
+
+XAI_BASE_URL = "https://api.x.ai/v1"
+
+# Read once at import. The API loads .env.local at startup; standalone scripts
+# that import the analyzer directly fall back to loading it here.
+_API_KEY = os.getenv("XAI_API_KEY")
+if _API_KEY is None:
+    load_dotenv(".env.local")
+    _API_KEY = os.getenv("XAI_API_KEY")
+
+# Grok reasoning calls can run for minutes, but a dead host should fail fast.
+XAI_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Failures worth another attempt: dropped/timed-out connections, 429s and 5xx.
+# The analyzer retries these itself, so the SDK's own retry loop is disabled.
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Raised for a request the API refuses outright, e.g. a response schema it rejects
+REQUEST_REJECTED = BadRequestError
+
+# Cap on in-flight Grok requests per worker, so a burst of analyses queues here
+# instead of tripping xAI's concurrency limit and burning retries on 429s.
+GROK_MAX_CONCURRENCY = 50
+
+# The pool, the slot semaphore and the client wrapping them belong to the event
+# loop that first uses them, so they are built lazily by get_client().
+_client: AsyncOpenAI | None = None
+_http_client: httpx.AsyncClient | None = None
+_grok_slots: asyncio.Semaphore | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_client() -> AsyncOpenAI:
+    """
+    Return the process-wide Grok client, creating it on first use.
+
+    Asyncio primitives and pooled connections cannot cross event loops, so a
+    different running loop (a script's second asyncio.run, a test) gets a fresh
+    pool, semaphore and client instead of ones bound to a finished loop.
+    """
+    global _client, _http_client, _grok_slots, _loop
+
+    loop = _running_loop()
+    if _client is None or (loop is not None and loop is not _loop):
+        if not _API_KEY:
+            raise RuntimeError(
+                "XAI_API_KEY is not set — add it to .env.local before running analysis"
+            )
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=XAI_TIMEOUT,
+        )
+        _grok_slots = asyncio.Semaphore(GROK_MAX_CONCURRENCY)
+        _client = AsyncOpenAI(
+            api_key=_API_KEY,
+            base_url=XAI_BASE_URL,
+            timeout=XAI_TIMEOUT,
+            max_retries=0,
+            http_client=_http_client,
+        )
+        _loop = loop
+        logger.info("xAI Grok client initialized")
+
+    return _client
+
+
+def get_grok_slots() -> asyncio.Semaphore:
+    """Return the in-flight request cap shared by every caller of get_client()."""
+    get_client()
+    return _grok_slots
+
+
+async def aclose_http_client() -> None:
+    """Close the shared Grok connection pool (call from FastAPI shutdown)."""
+    global _client, _http_client, _grok_slots, _loop
+
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.info("xAI Grok connection pool closed")
+    _client = _http_client = _grok_slots = _loop = None
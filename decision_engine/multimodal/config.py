@@ -36,5 +36,8 @@ EXTRACTION_CONFIG = {
     "max_text_length": 50000,  # Maximum text length to prevent token overflow
 }
 
+# Max concurrent Grok Vision requests when a query includes several images
+VISION_MAX_WORKERS = 4
+
 # Logging
 LOG_LEVEL = "INFO"
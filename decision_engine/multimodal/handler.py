@@ -18,6 +18,7 @@ Integration Points:
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 from io import BytesIO
@@ -33,7 +34,7 @@ except ImportError:
 
 from .image_parser import ImageParser
 from .document_parser import DocumentParser
-from .config import EXTRACTION_CONFIG
+from .config import EXTRACTION_CONFIG, VISION_MAX_WORKERS
 
 logger = logging.getLogger(__name__)
 
@@ -238,54 +239,38 @@ class MultimodalHandler:
         Returns:
             List of analysis results from Grok Vision
         """
-        results = []
-        
-        # Process file paths
-        if image_files:
-            for img_path in image_files:
-                try:
-                    # Read image as base64
-                    with open(img_path, "rb") as f:
-                        img_bytes = f.read()
-                    img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-                    
-                    # Analyze with Grok Vision
-                    analysis = self._analyze_image_with_grok_vision(
-                        img_base64,
-                        Path(img_path).name,
-                        user_query
-                    )
-                    results.append(analysis)
-                except Exception as e:
-                    logger.error(f"Error processing image {img_path} with Vision: {e}")
-                    results.append({
-                        "success": False,
-                        "error": str(e),
-                        "source": str(img_path),
-                        "method": "grok-vision"
-                    })
-        
-        # Process bytes
-        if image_bytes_list:
-            for img_bytes, filename in image_bytes_list:
-                try:
-                    img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-                    analysis = self._analyze_image_with_grok_vision(
-                        img_base64,
-                        filename,
-                        user_query
-                    )
-                    results.append(analysis)
-                except Exception as e:
-                    logger.error(f"Error processing image bytes {filename} with Vision: {e}")
-                    results.append({
-                        "success": False,
-                        "error": str(e),
-                        "source": filename,
-                        "method": "grok-vision"
-                    })
-        
-        return results
+        # Each image is an independent Grok Vision round trip, so fan them out
+        # instead of paying for them back to back. Results keep input order.
+        jobs = [(str(img_path), None) for img_path in image_files or []]
+        jobs += [(filename, img_bytes) for img_bytes, filename in image_bytes_list or []]
+        if not jobs:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(len(jobs), VISION_MAX_WORKERS)) as pool:
+            return list(pool.map(lambda job: self._vision_job(*job, user_query), jobs))
+    
+    def _vision_job(self, source: str, img_bytes: Optional[bytes], user_query: str) -> Dict:
+        """Run Grok Vision on one image given as a file path or raw bytes."""
+        try:
+            if img_bytes is None:
+                # Read image as base64
+                with open(source, "rb") as f:
+                    img_bytes = f.read()
+                filename = Path(source).name
+            else:
+                filename = source
+            img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+            
+            # Analyze with Grok Vision
+            return self._analyze_image_with_grok_vision(img_base64, filename, user_query)
+        except Exception as e:
+            logger.error(f"Error processing image {source} with Vision: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "source": source,
+                "method": "grok-vision"
+            }
     
     def _analyze_image_with_grok_vision(
         self,
@@ -11,13 +11,13 @@ import os
 import pickle
 import re
 import sys
+import threading
 from datetime import datetime, timedelta
 from typing import Any
 
 import numpy as np
 import pandas as pd
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from sqlalchemy.orm import Session
 
 # Set up logging (cloud-friendly: logs to stdout)
@@ -36,6 +36,63 @@ except Exception as e:
     logger.error(f"Error initializing SentenceTransformer: {e}")
     raise
 
+# Default copy for algorithmic stacks; replaced by LLM-enriched text when available.
+_DEFAULT_AUTOMATION_LOGIC = (
+    "Set up tools in sequence so data/events flow between them, then automate repeated manual tasks."
+)
+_SETUP_WHY_PRIMARY = "Primary execution tool"
+_SETUP_WHY_FOLLOWUP = "Connects and automates subsequent workflow steps"
+
+# Tokenization for compatibility scoring. Filler words are not shared ecosystem
+# or audience: without _STOPWORDS, "for teams that use the tools" overlapped any
+# other description phrased the same way and earned up to the full 0.2 overlap
+# bonus. Pairs that only shared such words now score lower than before.
+_LIST_SEPARATOR_RE = re.compile(r"\||,|;")
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9\-\+]+")
+_STOPWORDS = frozenset(
+    {
+        "the", "and", "for", "with", "from", "into", "that", "this", "your", "you",
+        "are", "can", "via", "all", "any", "its", "our", "who", "use", "using",
+        "other", "more", "tools", "tool",
+    }
+)
+
+
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Return embeddings as a contiguous float32 matrix of unit-length rows."""
+    normalized = np.array(embeddings, dtype=np.float32, order="C")
+    normalized /= np.linalg.norm(normalized, axis=1, keepdims=True).clip(min=1e-12)
+    return normalized
+
+
+def _cosine_scores(queries: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of each query row against every catalog embedding.
+
+    Both sides must already be L2-normalized, so cosine reduces to a dot product.
+
+    Args:
+        queries: (n_queries, dim) normalized query embeddings
+        embeddings: (n_tools, dim) normalized catalog embeddings
+
+    Returns:
+        (n_queries, n_tools) similarity matrix
+    """
+    return np.asarray(queries, dtype=np.float32) @ embeddings.T
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+
+    Partitions in O(N) and sorts only the k winners instead of the whole array.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
 
 class AIToolRecommender:
     """
@@ -153,34 +210,30 @@ class AIToolRecommender:
         from database.pg_models import AITool
 
         try:
-            # Query all tools from database
-            tools = self.db.query(AITool).all()
-
-            if not tools:
+            # Select only the columns recommendations use — skips ORM hydration and
+            # the unused text blobs (pros/cons, ai_categories) and timestamps.
+            rows = self.db.query(
+                AITool.id,
+                AITool.name,
+                AITool.description,
+                AITool.summary,
+                AITool.main_category,
+                AITool.sub_category,
+                AITool.pricing,
+                AITool.ratings,
+                AITool.key_features,
+                AITool.who_should_use,
+                AITool.compatibility_integration,
+            ).all()
+
+            if not rows:
                 logger.warning("No tools found in database. Run migration script first.")
                 self.tools_df = pd.DataFrame()
                 self.embeddings = np.array([])
                 return
 
             # Convert to DataFrame for easier processing
-            tools_data = []
-            for tool in tools:
-                tools_data.append(
-                    {
-                        "id": tool.id,
-                        "name": tool.name,
-                        "description": tool.description,
-                        "main_category": tool.main_category,
-                        "sub_category": tool.sub_category,
-                        "pricing": tool.pricing,
-                        "ratings": tool.ratings,
-                        "key_features": tool.key_features,
-                        "pros": tool.pros,
-                        "cons": tool.cons,
-                        "who_should_use": tool.who_should_use,
-                        "compatibility_integration": tool.compatibility_integration,
-                    }
-                )
+            tools_data = [row._asdict() for row in rows]
 
             tools_df = pd.DataFrame(tools_data)
             logger.info(f"Loaded {len(tools_df)} tools from database")
@@ -198,7 +251,9 @@ class AIToolRecommender:
                     # Verify data hasn't changed
                     if cached_hash == current_hash and len(cached_df) == len(tools_df):
                         self.tools_df = tools_df  # Use fresh data from DB
-                        self.embeddings = cached_embeddings  # Use cached embeddings
+                        # Use cached embeddings (normalizing is a no-op for fresh caches,
+                        # but upgrades ones written before embeddings were stored unit-length)
+                        self.embeddings = _normalize_rows(cached_embeddings)
                         logger.info("🚀 Using cached embeddings (data unchanged)")
                         return
                     else:
@@ -207,7 +262,15 @@ class AIToolRecommender:
             # Generate new embeddings (cache miss or disabled)
             logger.info("Generating embeddings... (this may take a moment)")
             descriptions = tools_df["description"].tolist()
-            embeddings = model.encode(descriptions, convert_to_tensor=False, show_progress_bar=True)
+            # Unit-length rows so each query is a single matvec; large batches
+            # keep the encoder's matmuls saturated on cold start
+            embeddings = model.encode(
+                descriptions,
+                batch_size=256,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
 
             self.tools_df = tools_df
             self.embeddings = embeddings
@@ -222,16 +285,20 @@ class AIToolRecommender:
             logger.error(f"Error loading tools from database: {e}")
             raise
 
-    def recommend(self, user_query: str, top_k: int = 5) -> list[dict]:
+    def recommend(
+        self, user_query: str, top_k: int = 5, description_chars: int | None = None
+    ) -> list[dict]:
         """
         Recommend top_k AI tools based on cosine similarity with user query.
 
         Args:
             user_query: User input describing their needs
             top_k: Number of recommendations to return
+            description_chars: Truncate descriptions to this length (None = full text)
 
         Returns:
-            List of dicts with tool_name, similarity_score, and description
+            List of dicts with tool_name, similarity_score, description, and summary
+            (the catalog's one-line summary, falling back to the description)
         """
         try:
             if self.tools_df.empty:
@@ -239,32 +306,38 @@ class AIToolRecommender:
                 return []
 
             # Generate embedding for user query
-            query_embedding = model.encode([user_query], convert_to_tensor=False)[0]
+            query_embeddings = model.encode(
+                [user_query], convert_to_numpy=True, normalize_embeddings=True
+            )
 
             # Compute cosine similarity
-            similarities = cosine_similarity([query_embedding], self.embeddings)[0]
+            similarities = _cosine_scores(query_embeddings, self.embeddings)[0]
 
             # Get top_k indices and scores
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            top_scores = [float(score) for score in similarities[top_indices]]
+            top_indices = _top_k_indices(similarities, top_k)
+            top_scores = similarities[top_indices].tolist()
 
             # Map to tool details
             recommendations = []
             for idx, i in enumerate(top_indices):
                 tool = self.tools_df.iloc[i]
+                summary = tool["summary"]
+                if not isinstance(summary, str) or not summary.strip():
+                    summary = tool["description"]
                 recommendations.append(
                     {
                         "tool_name": tool["name"],
                         "similarity_score": top_scores[idx],
-                        "description": tool["description"],
+                        "description": tool["description"][:description_chars],
+                        "summary": " ".join(summary.split())[:description_chars],
                     }
                 )
 
-            logger.info(f"Generated {len(recommendations)} recommendations for: '{user_query}'")
+            logger.info("Generated %d recommendations for: '%s'", len(recommendations), user_query)
             return recommendations
 
         except Exception as e:
-            logger.error(f"Error in recommend: {e}")
+            logger.error("Error in recommend: %s", e)
             raise
 
     def refresh(self, clear_cache: bool = True):
@@ -293,6 +366,7 @@ class AIToolRecommender:
 
 # Global recommender instance (initialized when first needed)
 _recommender_instance = None
+_recommender_lock = threading.Lock()
 
 
 def get_recommender(db_session: Session) -> AIToolRecommender:
@@ -309,12 +383,20 @@ def get_recommender(db_session: Session) -> AIToolRecommender:
     global _recommender_instance
 
     if _recommender_instance is None:
-        _recommender_instance = AIToolRecommender(db_session)
+        # Callers run in worker threads; only one of them may load the catalog.
+        with _recommender_lock:
+            if _recommender_instance is None:
+                _recommender_instance = AIToolRecommender(db_session)
 
     return _recommender_instance
 
 
-def recommend_tools(user_query: str, top_k: int = 5, db_session: Session = None) -> list[dict]:
+def recommend_tools(
+    user_query: str,
+    top_k: int = 5,
+    db_session: Session = None,
+    description_chars: int | None = None,
+) -> list[dict]:
     """
     Convenience function for tool recommendations.
 
@@ -322,6 +404,7 @@ def recommend_tools(user_query: str, top_k: int = 5, db_session: Session = None)
         user_query: User input describing their needs
         top_k: Number of recommendations
         db_session: Database session (required)
+        description_chars: Truncate descriptions to this length (None = full text)
 
     Returns:
         List of tool recommendations
@@ -330,7 +413,7 @@ def recommend_tools(user_query: str, top_k: int = 5, db_session: Session = None)
         raise ValueError("Database session is required")
 
     recommender = get_recommender(db_session)
-    return recommender.recommend(user_query, top_k)
+    return recommender.recommend(user_query, top_k, description_chars=description_chars)
 
 
 def _safe_parse_text_list(value: Any) -> list[str]:
@@ -356,7 +439,7 @@ def _safe_parse_text_list(value: Any) -> list[str]:
                 pass
 
         # Split by common separators
-        parts = re.split(r"\||,|;", text_value)
+        parts = _LIST_SEPARATOR_RE.split(text_value)
         return [part.strip() for part in parts if part.strip()]
 
     return []
@@ -364,53 +447,79 @@ def _safe_parse_text_list(value: Any) -> list[str]:
 
 def _normalize_tokens(values: list[str]) -> set[str]:
     """Normalize tokens for lightweight overlap-based compatibility scoring."""
-    tokens: set[str] = set()
-    for value in values:
-        for token in re.findall(r"[a-zA-Z0-9\-\+]+", value.lower()):
-            if len(token) >= 3:
-                tokens.add(token)
-    return tokens
+    return {
+        token
+        for value in values
+        for token in _TOKEN_RE.findall(value.lower())
+        if len(token) >= 3 and token not in _STOPWORDS
+    }
+
+
+def _compatibility_profile(tool: dict) -> dict:
+    """Parse and tokenize a tool's integration/use-case fields once for pair scoring."""
+    integrations = _safe_parse_text_list(tool.get("compatibility_integration"))
+    return {
+        "name": str(tool.get("name", "")).lower(),
+        "integrations": [integration.lower() for integration in integrations],
+        "integration_tokens": _normalize_tokens(integrations),
+        "use_case_tokens": _normalize_tokens(_safe_parse_text_list(tool.get("who_should_use"))),
+        "main_category": tool.get("main_category"),
+    }
 
 
 def _compute_pair_compatibility(left_tool: dict, right_tool: dict) -> float:
     """Heuristic compatibility score between two tools in range [0, 1]."""
-    left_name = str(left_tool.get("name", "")).lower()
-    right_name = str(right_tool.get("name", "")).lower()
+    left = left_tool["compat_profile"]
+    right = right_tool["compat_profile"]
+    left_name = left["name"]
+    right_name = right["name"]
     if not left_name or not right_name:
         return 0.0
 
-    left_integrations = _safe_parse_text_list(left_tool.get("compatibility_integration"))
-    right_integrations = _safe_parse_text_list(right_tool.get("compatibility_integration"))
-    left_integration_tokens = _normalize_tokens(left_integrations)
-    right_integration_tokens = _normalize_tokens(right_integrations)
-
-    left_use_cases = _normalize_tokens(_safe_parse_text_list(left_tool.get("who_should_use")))
-    right_use_cases = _normalize_tokens(_safe_parse_text_list(right_tool.get("who_should_use")))
-
     score = 0.0
 
     # Explicit integration mention by name is a strong signal.
-    if any(right_name in integration.lower() for integration in left_integrations):
+    if any(right_name in integration for integration in left["integrations"]):
         score += 0.35
-    if any(left_name in integration.lower() for integration in right_integrations):
+    if any(left_name in integration for integration in right["integrations"]):
         score += 0.35
 
     # Shared integration ecosystem and use-case overlap are medium signals.
-    if left_integration_tokens and right_integration_tokens:
-        overlap = len(left_integration_tokens.intersection(right_integration_tokens))
+    if left["integration_tokens"] and right["integration_tokens"]:
+        overlap = len(left["integration_tokens"].intersection(right["integration_tokens"]))
         score += min(0.2, overlap * 0.05)
 
-    if left_use_cases and right_use_cases:
-        overlap = len(left_use_cases.intersection(right_use_cases))
+    if left["use_case_tokens"] and right["use_case_tokens"]:
+        overlap = len(left["use_case_tokens"].intersection(right["use_case_tokens"]))
         score += min(0.2, overlap * 0.05)
 
     # Similar category usually indicates easier workflow fit.
-    if left_tool.get("main_category") and left_tool.get("main_category") == right_tool.get("main_category"):
+    if left["main_category"] and left["main_category"] == right["main_category"]:
         score += 0.1
 
     return max(0.0, min(score, 1.0))
 
 
+def _candidate_from_row(index: int, tool_row: pd.Series, query_similarity: float) -> dict:
+    """Build the candidate dict used by stack assembly from a catalog row."""
+    candidate = {
+        "index": index,
+        "id": int(tool_row["id"]),
+        "name": str(tool_row["name"]),
+        "description": str(tool_row.get("description", "") or ""),
+        "main_category": tool_row.get("main_category"),
+        "sub_category": tool_row.get("sub_category"),
+        "pricing": tool_row.get("pricing"),
+        "ratings": float(tool_row.get("ratings") or 0.0),
+        "key_features": tool_row.get("key_features"),
+        "compatibility_integration": tool_row.get("compatibility_integration"),
+        "who_should_use": tool_row.get("who_should_use"),
+        "query_similarity": query_similarity,
+    }
+    candidate["compat_profile"] = _compatibility_profile(candidate)
+    return candidate
+
+
 def recommend_automation_stacks(
     user_query: str,
     action_plans: list[dict],
@@ -440,9 +549,6 @@ def recommend_automation_stacks(
     if recommender.embeddings is None or len(recommender.embeddings) == 0:
         return []
 
-    query_embedding = model.encode([user_query], convert_to_tensor=False)[0]
-    global_similarities = cosine_similarity([query_embedding], recommender.embeddings)[0]
-
     action_queries: list[tuple[int, str]] = []
     for plan in action_plans or []:
         title = str(plan.get("title", "")).strip()
@@ -452,38 +558,31 @@ def recommend_automation_stacks(
         if query:
             action_queries.append((int(plan.get("id", len(action_queries) + 1)), query))
 
+    # Embed the global query and every action query in one batch, then score them
+    # all against the catalog with a single similarity matrix.
+    query_embeddings = model.encode(
+        [user_query] + [query for _, query in action_queries],
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+    similarity_matrix = _cosine_scores(query_embeddings, recommender.embeddings)
+    global_similarities = similarity_matrix[0]
+
     # Gather candidate indices from global query + each action query to preserve semantic relevance.
-    candidate_indices: set[int] = set(np.argsort(global_similarities)[::-1][:20].tolist())
+    candidate_indices: set[int] = set(_top_k_indices(global_similarities, 20).tolist())
 
-    action_similarity_maps: dict[int, np.ndarray] = {}
-    for action_id, query in action_queries:
-        action_embedding = model.encode([query], convert_to_tensor=False)[0]
-        action_sims = cosine_similarity([action_embedding], recommender.embeddings)[0]
-        action_similarity_maps[action_id] = action_sims
-        candidate_indices.update(np.argsort(action_sims)[::-1][:8].tolist())
+    # Rows follow action_queries: action_matrix[a, t] = similarity of action a to tool t
+    action_matrix = similarity_matrix[1:]
+    for action_sims in action_matrix:
+        candidate_indices.update(_top_k_indices(action_sims, 8).tolist())
 
     if not candidate_indices:
         return []
 
-    candidate_tools: list[dict] = []
-    for index in sorted(candidate_indices):
-        tool_row = tools_df.iloc[index]
-        candidate_tools.append(
-            {
-                "index": index,
-                "id": int(tool_row["id"]),
-                "name": str(tool_row["name"]),
-                "description": str(tool_row.get("description", "") or ""),
-                "main_category": tool_row.get("main_category"),
-                "sub_category": tool_row.get("sub_category"),
-                "pricing": tool_row.get("pricing"),
-                "ratings": float(tool_row.get("ratings") or 0.0),
-                "key_features": tool_row.get("key_features"),
-                "compatibility_integration": tool_row.get("compatibility_integration"),
-                "who_should_use": tool_row.get("who_should_use"),
-                "query_similarity": float(global_similarities[index]),
-            }
-        )
+    candidate_tools: list[dict] = [
+        _candidate_from_row(index, tools_df.iloc[index], float(global_similarities[index]))
+        for index in sorted(candidate_indices)
+    ]
 
     candidate_tools.sort(key=lambda item: item["query_similarity"], reverse=True)
     if not candidate_tools:
@@ -495,13 +594,20 @@ def recommend_automation_stacks(
     seed_count = min(8, len(candidate_tools))
     for seed in candidate_tools[:seed_count]:
         chosen: list[dict] = [seed]
-        remaining = [tool for tool in candidate_tools if tool["id"] != seed["id"]]
+        chosen_ids: set[int] = {seed["id"]}
 
-        while len(chosen) < max_tools_per_stack and remaining:
+        while len(chosen) < max_tools_per_stack and len(chosen_ids) < len(candidate_tools):
             best_tool = None
             best_score = 0.0
 
-            for tool in remaining:
+            for tool in candidate_tools:
+                # Candidates are sorted by similarity and compatibility is capped at 1.0,
+                # so once the best reachable score can't win, no later tool can either.
+                score_ceiling = (0.7 * tool["query_similarity"]) + 0.3
+                if score_ceiling <= best_score or score_ceiling < 0.45:
+                    break
+                if tool["id"] in chosen_ids:
+                    continue
                 pair_scores = [_compute_pair_compatibility(tool, selected) for selected in chosen]
                 compatibility_score = sum(pair_scores) / len(pair_scores) if pair_scores else 0.0
                 combined_score = (0.7 * tool["query_similarity"]) + (0.3 * compatibility_score)
@@ -513,27 +619,26 @@ def recommend_automation_stacks(
                 break
 
             chosen.append(best_tool)
-            remaining = [tool for tool in remaining if tool["id"] != best_tool["id"]]
+            chosen_ids.add(best_tool["id"])
 
         signature = tuple(sorted(tool["id"] for tool in chosen))
         if signature in seen_signatures:
             continue
         seen_signatures.add(signature)
 
+        # Best match per action across the stack's tools, as one column gather + row max
         action_coverage: list[dict] = []
-        for action_id, action_query in action_queries:
-            sims = action_similarity_maps.get(action_id)
-            if sims is None:
-                continue
-            match = max(float(sims[tool["index"]]) for tool in chosen)
-            if match >= 0.45:
-                action_coverage.append(
-                    {
-                        "action_id": action_id,
-                        "action": action_query[:160],
-                        "match_score": round(match, 3),
-                    }
-                )
+        if action_queries:
+            best_matches = action_matrix[:, [tool["index"] for tool in chosen]].max(axis=1)
+            for (action_id, action_query), match in zip(action_queries, best_matches.tolist()):
+                if match >= 0.45:
+                    action_coverage.append(
+                        {
+                            "action_id": action_id,
+                            "action": action_query[:160],
+                            "match_score": round(match, 3),
+                        }
+                    )
 
         pairwise_scores: list[float] = []
         for i in range(len(chosen)):
@@ -562,9 +667,7 @@ def recommend_automation_stacks(
                 "confidence": confidence,
                 "estimated_effort": effort,
                 "coverage_actions": action_coverage,
-                "automation_logic": (
-                    "Set up tools in sequence so data/events flow between them, then automate repeated manual tasks."
-                ),
+                "automation_logic": _DEFAULT_AUTOMATION_LOGIC,
                 "tools": [
                     {
                         "tool_id": tool["id"],
@@ -585,11 +688,7 @@ def recommend_automation_stacks(
                     {
                         "position": position + 1,
                         "tool_name": tool["name"],
-                        "why": (
-                            "Primary execution tool"
-                            if position == 0
-                            else "Connects and automates subsequent workflow steps"
-                        ),
+                        "why": _SETUP_WHY_PRIMARY if position == 0 else _SETUP_WHY_FOLLOWUP,
                     }
                     for position, tool in enumerate(chosen)
                 ],
@@ -0,0 +1,67 @@
+# decision_engine/stage_cache.py
+"""
+In-process cache for analyzer stage results.
+
+Users frequently resubmit the same business goal (retries after a dropped
+connection, demo queries). Keying each Grok stage on a hash of its normalized
+inputs lets a repeat skip the round trip entirely.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+def stage_key(stage: str, *parts: str) -> str:
+    """Build a cache key from a stage name and its case/whitespace-normalized inputs."""
+    normalized = "\x1f".join(" ".join(str(part).lower().split()) for part in parts)
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{stage}:{digest}"
+
+
+class StageCache:
+    """
+    Thread-safe TTL + LRU cache of JSON-like stage results.
+
+    Values are deep-copied on the way in and out because the pipeline mutates
+    stage results (e.g. attaching toolkits to action plans).
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """Return a copy of the cached value, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a copy of value, evicting the least recently used entries."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every analyzer in the process
+stage_cache = StageCache()
@@ -0,0 +1,322 @@
+"""Unit tests for decision_engine/agentic_analyzer.py helpers (no Grok calls)."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+
+from decision_engine import agentic_analyzer
+from decision_engine.agentic_analyzer import _StreamItemScanner
+from decision_engine.stage_cache import StageCache
+
+# ---------------------------------------------------------------------------
+# _StreamItemScanner
+# ---------------------------------------------------------------------------
+
+_BODY = (
+    '{"action_plans": ['
+    '{"title": "Plan A", "steps": [{"n": 1, "meta": {"k": "v"}}]}, '
+    '{"title": "Say \\"hi\\" {not a brace}", "note": "back\\\\slash"}, '
+    '{"title": "Plan [C]", "tags": ["}", "{", "]"]}'
+    '], "summary": {"title": "not an item"}}'
+)
+
+_ITEMS = [
+    {"title": "Plan A", "steps": [{"n": 1, "meta": {"k": "v"}}]},
+    {"title": 'Say "hi" {not a brace}', "note": "back\\slash"},
+    {"title": "Plan [C]", "tags": ["}", "{", "]"]},
+]
+
+
+def test_scanner_whole_body_yields_each_item():
+    assert _StreamItemScanner().feed(_BODY) == _ITEMS
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_scanner_split_chunks(size):
+    scanner = _StreamItemScanner()
+    items = []
+    for start in range(0, len(_BODY), size):
+        items.extend(scanner.feed(_BODY[start:start + size]))
+    assert items == _ITEMS
+
+
+def test_scanner_emits_item_as_soon_as_it_closes():
+    scanner = _StreamItemScanner()
+    first_end = _BODY.index("}]}") + 3
+    assert scanner.feed(_BODY[:first_end]) == [_ITEMS[0]]
+    assert scanner.feed(_BODY[first_end:]) == _ITEMS[1:]
+
+
+def test_scanner_escaped_quote_split_across_chunks():
+    body = '{"phases": [{"name": "a\\"}b"}]}'
+    scanner = _StreamItemScanner()
+    split = body.index("\\") + 1
+    assert scanner.feed(body[:split]) == []
+    assert scanner.feed(body[split:]) == [{"name": 'a"}b'}]
+
+
+def test_scanner_ignores_nested_objects_and_other_keys():
+    body = '{"meta": {"a": 1}, "phases": [{"x": {"y": {"z": 1}}}], "extra": [1, 2]}'
+    assert _StreamItemScanner().feed(body) == [{"x": {"y": {"z": 1}}}]
+
+
+def test_scanner_skips_undecodable_item():
+    # A bare word is not JSON; the scanner drops it and keeps going
+    body = '{"phases": [{"a": nope}, {"b": 2}]}'
+    assert _StreamItemScanner().feed(body) == [{"b": 2}]
+
+
+# ---------------------------------------------------------------------------
+# Stage 1 diagnosis cache
+# ---------------------------------------------------------------------------
+
+_DIAGNOSIS = {
+    "primary_bottleneck": {"title": "Manual onboarding", "description": "d", "consequence": "c"},
+    "strategic_priority": "p",
+    "what_to_stop": "s",
+    "secondary_constraints": [{"id": 1, "title": "Small team", "description": "d"}],
+}
+
+
+def _completion(payload: dict):
+    message = SimpleNamespace(content=orjson.dumps(payload).decode())
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def _analyzer(monkeypatch, responses):
+    """An analyzer whose Grok calls return the given payloads in order and are counted."""
+    monkeypatch.setattr(agentic_analyzer, "get_client", lambda: None)
+    analyzer = agentic_analyzer.AgenticAnalyzer(db_session=None)
+    analyzer.calls = []
+
+    async def fake_llm(**kwargs):
+        analyzer.calls.append(kwargs)
+        return _completion(responses[len(analyzer.calls) - 1])
+
+    analyzer._llm = fake_llm
+    return analyzer
+
+
+def test_diagnosis_cache_hit_skips_grok(monkeypatch):
+    monkeypatch.setattr(agentic_analyzer, "stage_cache", StageCache())
+    analyzer = _analyzer(monkeypatch, [_DIAGNOSIS])
+
+    first = asyncio.run(analyzer._stage1_diagnosis("Automate onboarding for my agency"))
+    # Same goal with different case/spacing, as a retry or another user would send it
+    second = asyncio.run(analyzer._stage1_diagnosis("automate  onboarding for my agency "))
+
+    assert len(analyzer.calls) == 1
+    assert first == second
+    assert second[1]["secondary_constraints"][0]["title"] == "Small team"
+    # The cached copy is unaffected by the pop() of secondary_constraints on a hit
+    third = asyncio.run(analyzer._stage1_diagnosis("Automate onboarding for my agency"))
+    assert third == first and len(analyzer.calls) == 1
+
+
+# ---------------------------------------------------------------------------
+# Strict json_schema response formats
+# ---------------------------------------------------------------------------
+
+_SCHEMA_FORMATS = {
+    "toolkit": agentic_analyzer._TOOLKIT_FORMAT,
+    "stack_enrichment": agentic_analyzer._STACK_ENRICHMENT_FORMAT,
+    "roadmap": agentic_analyzer._ROADMAP_FORMAT,
+}
+
+_JSON_TYPES = {"string", "integer", "number", "boolean", "array", "object", "null"}
+
+
+def _check_strict(node, path="$"):
+    """Strict structured outputs: typed nodes, closed objects, every property required."""
+    if "anyOf" in node:
+        assert node["anyOf"], path
+        for i, branch in enumerate(node["anyOf"]):
+            _check_strict(branch, f"{path}.anyOf[{i}]")
+        return
+    types = node["type"] if isinstance(node["type"], list) else [node["type"]]
+    assert set(types) <= _JSON_TYPES, path
+    if "object" in types:
+        assert node["additionalProperties"] is False, path
+        assert node["required"] == list(node["properties"]), path
+        for key, child in node["properties"].items():
+            _check_strict(child, f"{path}.{key}")
+    if "array" in types:
+        _check_strict(node["items"], f"{path}[]")
+
+
+@pytest.mark.parametrize("name", sorted(_SCHEMA_FORMATS))
+def test_response_format_schema_is_strict(name):
+    response_format = _SCHEMA_FORMATS[name]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    _check_strict(response_format["json_schema"]["schema"])
+
+
+def test_toolkit_schema_accepts_selection_and_no_selection():
+    jsonschema = pytest.importorskip("jsonschema")
+    schema = agentic_analyzer._TOOLKIT_FORMAT["json_schema"]["schema"]
+    jsonschema.Draft202012Validator.check_schema(schema)
+    validator = jsonschema.Draft202012Validator(schema)
+
+    tool = {"tool_name": "Zapier", "what_it_helps": "a", "why_this_tool": "b"}
+    assert validator.is_valid({"selected_tool_index": 0, "toolkit": tool})
+    assert validator.is_valid({"selected_tool_index": None, "toolkit": None})
+    assert not validator.is_valid({"selected_tool_index": "0", "toolkit": None})
+    assert not validator.is_valid({"selected_tool_index": 0, "toolkit": {"tool_name": "x"}})
+
+
+class _SchemaRejectingCompletions:
+    """Fake chat.completions that 400s on any json_schema response_format."""
+
+    def __init__(self):
+        self.formats = []
+
+    async def create(self, **kwargs):
+        self.formats.append(kwargs["response_format"]["type"])
+        if kwargs["response_format"]["type"] == "json_schema":
+            request = httpx.Request("POST", "https://api.x.ai/v1/chat/completions")
+            raise agentic_analyzer.REQUEST_REJECTED(
+                "Invalid response_format", response=httpx.Response(400, request=request), body=None
+            )
+        return _completion({"selected_tool_index": None, "toolkit": None})
+
+
+def test_rejected_schema_falls_back_to_json_mode(monkeypatch):
+    monkeypatch.setattr(agentic_analyzer, "_REJECTED_SCHEMAS", set())
+    completions = _SchemaRejectingCompletions()
+    monkeypatch.setattr(
+        agentic_analyzer, "get_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    analyzer = agentic_analyzer.AgenticAnalyzer(db_session=None)
+
+    async def two_calls():
+        for _ in range(2):
+            response = await analyzer._create(response_format=agentic_analyzer._TOOLKIT_FORMAT)
+            assert agentic_analyzer._json_content(response) == {
+                "selected_tool_index": None, "toolkit": None,
+            }
+
+    asyncio.run(two_calls())
+
+    # One rejected attempt, then JSON mode; the second call skips the schema
+    assert completions.formats == ["json_schema", "json_object", "json_object"]
+    assert sorted(agentic_analyzer._REJECTED_SCHEMAS) == ["toolkit_selection"]
+
+
+# ---------------------------------------------------------------------------
+# Stack enrichment
+# ---------------------------------------------------------------------------
+
+def _stack(stack_id):
+    return {
+        "stack_id": stack_id,
+        "stack_name": f"Base {stack_id}",
+        "automation_logic": "base logic",
+        "tools": [{"tool_name": f"Tool{stack_id}A"}, {"tool_name": f"Tool{stack_id}B"}],
+    }
+
+
+def _enrichment(stack_id):
+    return {
+        "stack_id": stack_id,
+        "stack_name": f"Enriched {stack_id}",
+        "workflow_summary": "w",
+        "automation_logic": "enriched logic",
+        "tool_roles": [
+            {"tool_name": f"Tool{stack_id}A", "role": "r", "hands_off_to": f"Tool{stack_id}B"},
+            {"tool_name": "Invented", "role": "r", "hands_off_to": ""},
+        ],
+        "setup_order": [{"position": 1, "tool_name": f"Tool{stack_id}A", "why": "y"}],
+    }
+
+
+def test_enrichment_merge_keeps_unmatched_stacks(monkeypatch):
+    # The model answers for stack 1 and an unknown id, and skips stack 2
+    analyzer = _analyzer(monkeypatch, [{"stacks": [_enrichment(1), _enrichment(99)]}])
+    stacks = [_stack(1), _stack(2), {"stack_id": 3, "stack_name": "No tools", "tools": []}]
+
+    result = asyncio.run(analyzer._enrich_stacks_with_llm(stacks, "goal", "bottleneck"))
+
+    assert result is stacks and len(result) == 3
+    assert result[0]["stack_name"] == "Enriched 1"
+    # Tool names the stack does not have are dropped from the merge
+    assert [role["tool_name"] for role in result[0]["tool_roles"]] == ["Tool1A"]
+    assert result[1] == _stack(2)
+    assert result[2] == {"stack_id": 3, "stack_name": "No tools", "tools": []}
+    assert len(analyzer.calls) == 1
+
+
+def test_enrichment_splits_large_batches(monkeypatch):
+    batch_size = agentic_analyzer._ENRICHMENT_BATCH_SIZE
+    stacks = [_stack(i) for i in range(1, batch_size + 2)]
+    responses = [
+        {"stacks": [_enrichment(i) for i in range(1, batch_size + 1)]},
+        {"stacks": [_enrichment(batch_size + 1)]},
+    ]
+    analyzer = _analyzer(monkeypatch, responses)
+
+    asyncio.run(analyzer._enrich_stacks_with_llm(stacks, "goal", "bottleneck"))
+
+    per_stack = agentic_analyzer._ENRICHMENT_TOKENS_PER_STACK
+    assert [call["max_tokens"] for call in analyzer.calls] == [per_stack * batch_size, per_stack]
+    assert all(stack["stack_name"].startswith("Enriched") for stack in stacks)
+
+
+def test_enrichment_failure_keeps_base_values(monkeypatch):
+    analyzer = _analyzer(monkeypatch, [])  # any call raises IndexError
+    stacks = [_stack(1)]
+
+    asyncio.run(analyzer._enrich_stacks_with_llm(stacks, "goal", "bottleneck"))
+
+    assert stacks == [_stack(1)]
+
+
+# ---------------------------------------------------------------------------
+# Toolkit attachment
+# ---------------------------------------------------------------------------
+
+_TOOLKIT = {"tool_name": "Zapier", "what_it_helps": "a", "why_this_tool": "b"}
+
+
+def _toolkit_analyzer(monkeypatch, scores):
+    analyzer = _analyzer(monkeypatch, [{"selected_tool_index": 0, "toolkit": _TOOLKIT}])
+
+    async def fake_search(user_query, action_description, top_k=3):
+        return [
+            {"tool_name": f"Tool{i}", "summary": "s", "similarity_score": score}
+            for i, score in enumerate(scores)
+        ]
+
+    analyzer._search_ai_tools = fake_search
+    return analyzer
+
+
+def _plan():
+    return {"title": "Automate invoicing", "what_to_do": "x", "needs_ai_tool": True}
+
+
+@pytest.mark.parametrize("scores", [[], [0.05, 0.1, 0.19]])
+def test_attach_toolkit_skips_grok_without_relevant_candidates(monkeypatch, scores):
+    assert all(score < agentic_analyzer._TOOLKIT_MIN_SIMILARITY for score in scores)
+    analyzer = _toolkit_analyzer(monkeypatch, scores)
+
+    plan = asyncio.run(analyzer._attach_toolkit(_plan(), "goal"))
+
+    assert plan["toolkit"] is None and "needs_ai_tool" not in plan
+    assert analyzer.calls == []
+
+
+@pytest.mark.parametrize("scores", [[0.2], [0.05, 0.35]])
+def test_attach_toolkit_asks_grok_when_one_candidate_is_relevant(monkeypatch, scores):
+    analyzer = _toolkit_analyzer(monkeypatch, scores)
+
+    plan = asyncio.run(analyzer._attach_toolkit(_plan(), "goal"))
+
+    assert plan["toolkit"] == _TOOLKIT
+    assert len(analyzer.calls) == 1
+    # Every candidate is offered, not only the ones above the threshold
+    assert all(f"{i}|Tool{i}|s" in analyzer.calls[0]["messages"][1]["content"]
+               for i in range(len(scores)))
@@ -0,0 +1,127 @@
+"""
+Route test for POST /api/business/analyze/stream with a stubbed analyzer.
+
+database.pg_connections connects to Postgres at import, so an offline stand-in
+with just the declarative Base is registered first; the route is handed a stub
+session and never queries a real database.
+"""
+
+import asyncio
+import sys
+import types
+
+import orjson
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import declarative_base
+from starlette.requests import Request
+
+if "database.pg_connections" not in sys.modules:
+    _offline = types.ModuleType("database.pg_connections")
+    _offline.Base = declarative_base()
+    _offline.engine = None
+    _offline.SessionLocal = None
+    _offline.get_db = lambda: iter(())
+    sys.modules["database.pg_connections"] = _offline
+
+import decision_engine.agentic_analyzer as agentic_analyzer  # noqa: E402
+from api.routes.decision_engine.analyzer import analyze_business_goal_stream  # noqa: E402
+
+
+class _NoRecentAnalysisDB:
+    """Session stub: the idempotency lookup finds nothing."""
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def first(self):
+        return None
+
+
+def _json_request(payload: dict) -> Request:
+    body = orjson.dumps(payload)
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/business/analyze/stream",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    return Request(scope, receive)
+
+
+def _parse_event(chunk: str):
+    event_line, data_line = chunk.strip().split("\n")
+    return event_line.removeprefix("event: "), orjson.loads(data_line.removeprefix("data: "))
+
+
+async def _open_stream(monkeypatch, analyzer):
+    monkeypatch.setattr(agentic_analyzer, "create_analyzer", lambda db: analyzer)
+    response = await analyze_business_goal_stream(
+        _json_request({"business_goal": "Automate onboarding for my agency"}),
+        BackgroundTasks(),
+        current_user={"id": 7},
+        db=_NoRecentAnalysisDB(),
+    )
+    return response.body_iterator
+
+
+class _FinishingAnalyzer:
+    async def analyze(self, user_query, user_id, progress_callback=None):
+        await progress_callback(30, "Diagnosing")
+        await progress_callback(60, "Roadmap phase 1 ready")
+        return {"data": {"analysis_id": 1, "user_id": user_id, "recommended_tool_stacks": []}}
+
+
+class _HangingAnalyzer:
+    def __init__(self):
+        self.cancelled = asyncio.Event()
+
+    async def analyze(self, user_query, user_id, progress_callback=None):
+        await progress_callback(30, "Diagnosing")
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+
+def test_stream_relays_progress_then_result(monkeypatch):
+    async def run():
+        stream = await _open_stream(monkeypatch, _FinishingAnalyzer())
+        return [_parse_event(chunk) async for chunk in stream]
+
+    events = asyncio.run(run())
+
+    assert [event for event, _ in events] == ["progress"] * 4 + ["result"]
+    assert [payload["pct"] for _, payload in events[:4]] == [5, 30, 60, 100]
+    assert events[1][1] == {"step": "thinking", "pct": 30, "msg": "Diagnosing"}
+    assert events[-1][1] == {
+        "success": True,
+        "data": {"analysis_id": 1, "user_id": 7, "recommended_tool_stacks": []},
+    }
+
+
+def test_stream_disconnect_cancels_analysis(monkeypatch):
+    analyzer = _HangingAnalyzer()
+
+    async def run():
+        stream = await _open_stream(monkeypatch, analyzer)
+        first = [_parse_event(await stream.__anext__()) for _ in range(2)]
+        # What Starlette does when the client goes away mid-stream
+        await stream.aclose()
+        await asyncio.wait_for(analyzer.cancelled.wait(), timeout=1)
+        return first
+
+    first = asyncio.run(run())
+
+    assert [payload["pct"] for _, payload in first] == [5, 30]
+    assert analyzer.cancelled.is_set()
@@ -0,0 +1,254 @@
+"""Unit tests for cron/content_utils.py (helpers shared by the content generators)."""
+
+import asyncio
+
+import numpy as np
+import orjson
+import pytest
+
+from cron import content_utils
+from cron.content_utils import (
+    DEAD_URL_TTL_SECONDS,
+    dead_url_key,
+    extract_json,
+    find_paraphrased_titles,
+    is_suspicious_url,
+    normalize_url,
+    remember_dead_urls,
+    skip_known_dead_urls,
+)
+
+# ---------------------------------------------------------------------------
+# extract_json
+# ---------------------------------------------------------------------------
+
+def test_extract_json_plain_array_unchanged():
+    assert extract_json('[{"title": "A"}]') == '[{"title": "A"}]'
+
+
+@pytest.mark.parametrize("fence", ["```json", "```", "~~~json", "~~~"])
+def test_extract_json_unwraps_fence(fence):
+    closing = fence[:3]
+    text = f'Here you go:\n{fence}\n[{{"title": "A"}}]\n{closing}\nEnjoy!'
+    assert orjson.loads(extract_json(text)) == [{"title": "A"}]
+
+
+def test_extract_json_trims_prose_and_trailing_junk():
+    text = 'Sure! {"items": [1, 2]} Let me know if you need more.'
+    assert orjson.loads(extract_json(text)) == {"items": [1, 2]}
+
+
+def test_extract_json_keeps_outermost_array_around_objects():
+    text = 'Result: [{"a": 1}, {"b": [2, 3]}] -- end'
+    assert orjson.loads(extract_json(text)) == [{"a": 1}, {"b": [2, 3]}]
+
+
+def test_extract_json_non_json_is_returned_for_the_decoder_to_reject():
+    text = "Sorry, I could not find any news today."
+    assert extract_json(text) == text
+    with pytest.raises(orjson.JSONDecodeError):
+        orjson.loads(extract_json(text))
+
+
+def test_extract_json_unbalanced_brackets_still_fail_to_decode():
+    with pytest.raises(orjson.JSONDecodeError):
+        orjson.loads(extract_json('[{"title": "A"'))
+
+
+# ---------------------------------------------------------------------------
+# normalize_url
+# ---------------------------------------------------------------------------
+
+def test_normalize_url_lowercases_host_only():
+    url = "HTTPS://WWW.Example.ORG/News/My-Article-ABC/?id=XyZ"
+    assert normalize_url(url) == "//example.org/News/My-Article-ABC?id=XyZ"
+
+
+def test_normalize_url_keeps_article_params_only():
+    url = "https://site.com/watch?utm_source=x&v=dQw4w9WgXcQ&src=feed&guccounter=1"
+    assert normalize_url(url) == "//site.com/watch?v=dQw4w9WgXcQ"
+
+
+def test_normalize_url_sorts_article_params():
+    a = normalize_url("https://site.com/post?p=2&id=7#comments")
+    b = normalize_url("http://www.site.com/post/?id=7&p=2")
+    assert a == b == "//site.com/post?id=7&p=2"
+
+
+def test_normalize_url_distinguishes_case_sensitive_ids():
+    assert normalize_url("https://youtu.be/watch?v=AbC") != normalize_url(
+        "https://youtu.be/watch?v=abc"
+    )
+
+
+# ---------------------------------------------------------------------------
+# is_suspicious_url
+# ---------------------------------------------------------------------------
+
+def _old_is_suspicious_url(url):
+    """The substring/loop version the regex replaced, kept as the reference."""
+    url_lower = url.lower()
+    if "example.com" in url_lower or "placeholder" in url_lower:
+        return True
+    for indicator in ["/category/", "/categories/", "/tag/", "/tags/", "/topic/", "/topics/"]:
+        if indicator in url_lower:
+            return True
+    last_part = url_lower.rstrip("/").split("/")[-1]
+    return last_part in [
+        "ai", "tech", "technology", "business", "news",
+        "artificial-intelligence", "machine-learning", "startup",
+    ]
+
+
+@pytest.mark.parametrize("url", [
+    "https://example.com/post/1",
+    "https://sub.EXAMPLE.com/story",
+    "https://news.site/placeholder-article",
+    "https://techcrunch.com/category/ai/",
+    "https://site.com/categories/startups/",
+    "https://site.com/tag/openai",
+    "https://site.com/Tags/llm/",
+    "https://site.com/topic/robots",
+    "https://site.com/topics/robots/",
+    "https://venturebeat.com/ai/",
+    "https://site.com/Technology",
+    "https://site.com/artificial-intelligence/",
+    "https://site.com/machine-learning",
+    "https://site.com/news",
+    "https://techcrunch.com/2024/05/01/openai-ships-new-model/",
+    "https://site.com/ai/openai-ships-new-model",
+    "https://site.com/topical/robots",
+    "https://site.com/tagged-post",
+    "https://site.com/newsletter",
+    "https://business.site.com/",
+    "",
+])
+def test_is_suspicious_url_matches_old_pattern_list(url):
+    assert is_suspicious_url(url) is _old_is_suspicious_url(url)
+
+
+# ---------------------------------------------------------------------------
+# Dead-URL cache
+# ---------------------------------------------------------------------------
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.queued.append((key, ttl, value))
+
+    async def execute(self):
+        for key, ttl, value in self.queued:
+            self.redis.store[key] = value
+            self.redis.ttls[key] = ttl
+        self.redis.executed += 1
+
+
+class _FakeRedis:
+    """Just the MGET/pipeline surface the helpers use."""
+
+    def __init__(self, fail=False):
+        self.store = {}
+        self.ttls = {}
+        self.mget_calls = 0
+        self.executed = 0
+        self.fail = fail
+
+    async def mget(self, keys):
+        if self.fail:
+            raise ConnectionError("down")
+        self.mget_calls += 1
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        if self.fail:
+            raise ConnectionError("down")
+        return _FakePipeline(self)
+
+
+def test_dead_url_key_shared_by_equivalent_urls():
+    assert dead_url_key("https://www.site.com/a/?utm_source=x") == dead_url_key("http://site.com/a")
+    assert dead_url_key("https://site.com/a") != dead_url_key("https://site.com/b")
+
+
+def test_skip_known_dead_urls_uses_one_mget():
+    redis = _FakeRedis()
+    redis.store[dead_url_key("https://dead.com/x")] = b"1"
+    urls = ["https://ok.com/a", "https://dead.com/x", "https://ok.com/b"]
+
+    to_check = asyncio.run(skip_known_dead_urls(redis, urls))
+
+    assert to_check == ["https://ok.com/a", "https://ok.com/b"]
+    assert redis.mget_calls == 1
+
+
+def test_skip_known_dead_urls_without_cache_or_on_error_checks_all():
+    urls = ["https://a.com/1", "https://b.com/2"]
+    assert asyncio.run(skip_known_dead_urls(None, urls)) == urls
+    assert asyncio.run(skip_known_dead_urls(_FakeRedis(fail=True), urls)) == urls
+
+
+def test_remember_dead_urls_setex_in_one_pipeline():
+    redis = _FakeRedis()
+    asyncio.run(remember_dead_urls(redis, ["https://dead.com/x", "https://gone.com/y"]))
+
+    assert redis.executed == 1
+    for url in ("https://dead.com/x", "https://gone.com/y"):
+        assert redis.ttls[dead_url_key(url)] == DEAD_URL_TTL_SECONDS
+    # Remembered URLs are skipped on the next run
+    assert asyncio.run(skip_known_dead_urls(redis, ["https://dead.com/x"])) == []
+
+
+def test_remember_dead_urls_noop_and_failure_are_quiet():
+    redis = _FakeRedis()
+    asyncio.run(remember_dead_urls(redis, []))
+    assert redis.executed == 0
+    asyncio.run(remember_dead_urls(_FakeRedis(fail=True), ["https://dead.com/x"]))
+
+
+# ---------------------------------------------------------------------------
+# find_paraphrased_titles
+# ---------------------------------------------------------------------------
+
+class _BagOfWordsEmbedder:
+    """Unit bag-of-words vectors: cosine is the shared-word overlap of two titles."""
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        vocab = sorted({word for text in texts for word in text.lower().split()})
+        vectors = np.array(
+            [[text.lower().split().count(word) for word in vocab] for text in texts],
+            dtype=np.float32,
+        )
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_find_paraphrased_titles_rejects_paraphrase_keeps_distinct():
+    recent = ["OpenAI launches GPT-5 model", "Stripe raises new funding round"]
+    candidates = ["OpenAI launches new GPT-5 model", "Nvidia earnings beat estimates"]
+
+    result = find_paraphrased_titles(candidates, recent, embedder=_BagOfWordsEmbedder())
+
+    # 4 shared words of 4 and 5: cosine 0.894, over the 0.88 default
+    assert result == ["OpenAI launches GPT-5 model", None]
+
+
+def test_find_paraphrased_titles_threshold_is_a_parameter():
+    recent = ["OpenAI launches GPT-5 model"]
+    candidates = ["OpenAI launches new GPT-5 model"]
+    embedder = _BagOfWordsEmbedder()
+
+    assert find_paraphrased_titles(candidates, recent, embedder, threshold=0.95) == [None]
+
+
+def test_find_paraphrased_titles_without_embedder_keeps_everything(monkeypatch):
+    monkeypatch.setattr(content_utils, "get_title_embedder", lambda: None)
+    assert find_paraphrased_titles(["A", "B"], ["A"]) == [None, None]
+    assert find_paraphrased_titles(["A"], [], embedder=_BagOfWordsEmbedder()) == [None]
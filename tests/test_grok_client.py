@@ -0,0 +1,62 @@
+"""Unit tests for decision_engine/grok_client.py (no requests are sent)."""
+
+import asyncio
+
+import pytest
+
+from decision_engine import grok_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    monkeypatch.setattr(grok_client, "_API_KEY", "test-key")
+    for name in ("_client", "_http_client", "_grok_slots", "_loop"):
+        monkeypatch.setattr(grok_client, name, None)
+    yield
+    if grok_client._http_client is not None:
+        asyncio.run(grok_client.aclose_http_client())
+
+
+def test_nothing_is_created_at_import():
+    assert grok_client._http_client is None
+    assert grok_client._grok_slots is None
+
+
+def test_same_loop_reuses_client_pool_and_slots():
+    async def grab():
+        return grok_client.get_client(), grok_client.get_grok_slots(), grok_client.get_client()
+
+    client, slots, again = asyncio.run(grab())
+    assert client is again
+    assert client._client is grok_client._http_client
+    assert slots is grok_client._grok_slots
+
+
+def test_new_loop_gets_fresh_client_and_slots():
+    async def grab():
+        async with grok_client.get_grok_slots():
+            return grok_client.get_client(), grok_client.get_grok_slots()
+
+    first_client, first_slots = asyncio.run(grab())
+    second_client, second_slots = asyncio.run(grab())
+
+    assert second_client is not first_client
+    assert second_slots is not first_slots
+
+
+def test_aclose_resets_for_next_use():
+    async def open_and_close():
+        grok_client.get_client()
+        pool = grok_client._http_client
+        await grok_client.aclose_http_client()
+        return pool
+
+    pool = asyncio.run(open_and_close())
+    assert pool.is_closed
+    assert grok_client._client is None and grok_client._http_client is None
+
+
+def test_missing_api_key(monkeypatch):
+    monkeypatch.setattr(grok_client, "_API_KEY", None)
+    with pytest.raises(RuntimeError, match="XAI_API_KEY"):
+        grok_client.get_client()
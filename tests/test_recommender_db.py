@@ -0,0 +1,223 @@
+"""
+Fixed-vector tests for decision_engine/recommender_db.py.
+
+The similarity helpers replaced sklearn's cosine_similarity plus a full argsort,
+and the stack builder gained an early exit; both are checked against the old
+behaviour on small hand-made catalogs.
+"""
+
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_engine import recommender_db
+from decision_engine.recommender_db import (
+    _cosine_scores,
+    _normalize_rows,
+    _top_k_indices,
+    recommend_automation_stacks,
+)
+
+_RNG = np.random.default_rng(42)
+_QUERIES = _RNG.normal(size=(3, 8))
+# Last catalog row is all zeros: sklearn scores it 0, so must we
+_CATALOG = np.vstack([_RNG.normal(size=(9, 8)), np.zeros((1, 8))])
+
+
+# ---------------------------------------------------------------------------
+# Similarity helpers vs. sklearn
+# ---------------------------------------------------------------------------
+
+def test_normalize_rows_unit_length_float32():
+    normalized = _normalize_rows(_CATALOG)
+    assert normalized.dtype == np.float32 and normalized.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(np.linalg.norm(normalized[:-1], axis=1), 1.0, rtol=1e-6)
+    assert not normalized[-1].any()
+
+
+def test_cosine_scores_match_sklearn():
+    sklearn_pairwise = pytest.importorskip("sklearn.metrics.pairwise")
+    expected = sklearn_pairwise.cosine_similarity(_QUERIES, _CATALOG)
+
+    scores = _cosine_scores(_normalize_rows(_QUERIES), _normalize_rows(_CATALOG))
+
+    assert scores.shape == (3, 10)
+    np.testing.assert_allclose(scores, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("k", [1, 3, 8, 10, 25])
+def test_top_k_indices_match_full_argsort(k):
+    scores = _cosine_scores(_normalize_rows(_QUERIES), _normalize_rows(_CATALOG))
+    for row in scores:
+        np.testing.assert_array_equal(_top_k_indices(row, k), np.argsort(row)[::-1][:k])
+
+
+def test_top_k_indices_empty():
+    assert _top_k_indices(np.array([0.3, 0.1]), 0).size == 0
+    assert _top_k_indices(np.array([]), 5).size == 0
+
+
+# ---------------------------------------------------------------------------
+# recommend_automation_stacks early exit
+# ---------------------------------------------------------------------------
+
+# (name, cosine to the query, integrations): similarity falls off down the list,
+# and the integrations make a few lower-ranked tools pair well with the leaders.
+_TOOLS = [
+    ("Zapier", 0.92, "Slack, HubSpot, Notion"),
+    ("HubSpot", 0.88, "Zapier, Mailchimp"),
+    ("Notion", 0.80, "Slack"),
+    ("Mailchimp", 0.74, "HubSpot, Shopify"),
+    ("Slack", 0.62, "Zapier, Notion"),
+    ("Shopify", 0.55, "Mailchimp"),
+    ("Canva", 0.30, "Slack"),
+    ("Figma", 0.12, "Notion, Canva"),
+    ("Trello", -0.05, "Slack, Zapier"),
+]
+
+
+def _catalog():
+    rows, vectors = [], []
+    for i, (name, cosine, integrations) in enumerate(_TOOLS):
+        rows.append({
+            "id": 100 + i,
+            "name": name,
+            "description": f"{name} description",
+            "main_category": "Productivity" if i % 2 else "Marketing",
+            "sub_category": None,
+            "pricing": "Freemium",
+            "ratings": 4.5,
+            "key_features": None,
+            "compatibility_integration": integrations,
+            "who_should_use": "small business owners, marketing teams",
+        })
+        # Unit vector at the given cosine to the query axis; the rest spread over
+        # the other axes so action similarities differ between tools
+        angle = 0.7 * i
+        rest = np.sqrt(1 - cosine ** 2)
+        vectors.append([cosine, rest * np.cos(angle), rest * np.sin(angle), 0.0])
+    return pd.DataFrame(rows), _normalize_rows(np.array(vectors))
+
+
+def _old_chain(seed, candidates, max_tools):
+    """The pre-early-exit greedy loop: score every remaining tool each round."""
+    compat = recommender_db._compute_pair_compatibility
+    chosen = [seed]
+    remaining = [tool for tool in candidates if tool["id"] != seed["id"]]
+    while len(chosen) < max_tools and remaining:
+        best_tool, best_score = None, 0.0
+        for tool in remaining:
+            pair_scores = [compat(tool, selected) for selected in chosen]
+            combined = 0.7 * tool["query_similarity"] + 0.3 * sum(pair_scores) / len(pair_scores)
+            if combined > best_score:
+                best_tool, best_score = tool, combined
+        if best_tool is None or best_score < 0.45:
+            break
+        chosen.append(best_tool)
+        remaining = [tool for tool in remaining if tool["id"] != best_tool["id"]]
+    return [tool["id"] for tool in chosen]
+
+
+def test_stack_early_exit_matches_exhaustive_search(monkeypatch):
+    tools_df, embeddings = _catalog()
+    monkeypatch.setattr(
+        recommender_db,
+        "get_recommender",
+        lambda db_session: SimpleNamespace(tools_df=tools_df, embeddings=embeddings),
+    )
+    query_vectors = np.array([[1.0, 0, 0, 0], [0, 1.0, 0, 0]], dtype=np.float32)
+    monkeypatch.setattr(
+        recommender_db, "model", SimpleNamespace(encode=lambda texts, **kwargs: query_vectors)
+    )
+    calls = {"n": 0}
+    real_compat = recommender_db._compute_pair_compatibility
+
+    def counting_compat(left, right):
+        calls["n"] += 1
+        return real_compat(left, right)
+
+    monkeypatch.setattr(recommender_db, "_compute_pair_compatibility", counting_compat)
+
+    stacks = recommend_automation_stacks(
+        "grow my newsletter",
+        [{"id": 1, "title": "Automate campaigns", "what_to_do": "send emails"}],
+        db_session=object(),
+    )
+    early_exit_calls = calls["n"]
+
+    # Candidates exactly as the builder sees them: every tool, best match first
+    candidates = sorted(
+        (
+            recommender_db._candidate_from_row(i, tools_df.iloc[i], float(embeddings[i, 0]))
+            for i in range(len(tools_df))
+        ),
+        key=lambda tool: tool["query_similarity"],
+        reverse=True,
+    )
+    by_id = {tool["id"]: tool for tool in candidates}
+
+    assert stacks
+    for stack in stacks:
+        tool_ids = [tool["tool_id"] for tool in stack["tools"]]
+        assert tool_ids == _old_chain(by_id[tool_ids[0]], candidates, 4)
+
+    # Same stacks, fewer pair scores: the low-similarity tail is never scored
+    all_seed_calls = 0
+    for seed in candidates[:8]:
+        calls["n"] = 0
+        _old_chain(seed, candidates, 4)
+        all_seed_calls += calls["n"]
+    assert early_exit_calls < all_seed_calls
+
+
+# ---------------------------------------------------------------------------
+# Compatibility tokens (stopword filtering changed pair scores)
+# ---------------------------------------------------------------------------
+
+def _old_tokens(values):
+    """Tokenizer before stopword filtering."""
+    return {
+        token
+        for value in values
+        for token in re.findall(r"[a-zA-Z0-9\-\+]+", value.lower())
+        if len(token) >= 3
+    }
+
+
+def _tool(name, who_should_use, integrations=""):
+    tool = {
+        "name": name,
+        "who_should_use": who_should_use,
+        "compatibility_integration": integrations,
+        "main_category": None,
+    }
+    tool["compat_profile"] = recommender_db._compatibility_profile(tool)
+    return tool
+
+
+def test_normalize_tokens_drops_only_stopwords():
+    values = ["Agencies that use the tools", "E-commerce + SaaS teams, for you"]
+    tokens = recommender_db._normalize_tokens(values)
+    assert tokens == {"agencies", "e-commerce", "saas", "teams"}
+    assert tokens == _old_tokens(values) - recommender_db._STOPWORDS
+
+
+def test_filler_only_overlap_no_longer_scores():
+    left = _tool("Jasper", "Writers that use the tools")
+    right = _tool("Canva", "Designers that use the tools")
+    # Old tokens shared that/use/the/tools: 4 * 0.05 = the full 0.2 bonus
+    shared = _old_tokens(["Writers that use the tools"]) & _old_tokens(
+        ["Designers that use the tools"]
+    )
+    assert len(shared) == 4
+    assert recommender_db._compute_pair_compatibility(left, right) == 0.0
+
+
+def test_real_audience_overlap_still_scores():
+    left = _tool("Jasper", "Marketing agencies and ecommerce teams")
+    right = _tool("Canva", "Ecommerce teams and marketing freelancers")
+    # marketing, ecommerce, teams
+    assert recommender_db._compute_pair_compatibility(left, right) == pytest.approx(0.15)
@@ -0,0 +1,69 @@
+"""Unit tests for decision_engine/stage_cache.py."""
+
+from decision_engine import stage_cache as stage_cache_module
+from decision_engine.stage_cache import StageCache, stage_key
+
+
+class _Clock:
+    """Stands in for time.monotonic so TTL tests do not sleep."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stage_key_normalizes_case_and_whitespace():
+    assert stage_key("diagnosis", "Grow  my\tSaaS ") == stage_key("diagnosis", "grow my saas")
+
+
+def test_stage_key_separates_stage_and_parts():
+    assert stage_key("diagnosis", "a") != stage_key("action_plans", "a")
+    # Part boundaries matter: ("a b", "c") is not ("a", "b c")
+    assert stage_key("s", "a b", "c") != stage_key("s", "a", "b c")
+    assert stage_key("s", "x").startswith("s:")
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(stage_cache_module.time, "monotonic", clock)
+    cache = StageCache(ttl_seconds=60)
+    cache.set("k", {"v": 1})
+
+    clock.now += 59
+    assert cache.get("k") == {"v": 1}
+    clock.now += 2
+    assert cache.get("k") is None
+    assert "k" not in cache._entries
+
+
+def test_lru_eviction_keeps_recently_read():
+    cache = StageCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_values_are_isolated_by_deepcopy():
+    cache = StageCache()
+    value = {"plans": [{"title": "A"}]}
+    cache.set("k", value)
+
+    value["plans"][0]["title"] = "mutated before read"
+    first = cache.get("k")
+    first["plans"].append({"title": "mutated after read"})
+
+    assert cache.get("k") == {"plans": [{"title": "A"}]}
+
+
+def test_clear():
+    cache = StageCache()
+    cache.set("k", 1)
+    cache.clear()
+    assert cache.get("k") is None